@@ -82,7 +82,9 @@ class MainWindow(QMainWindow):
         self.console.setGeometry(int(self.x() - (self.width() / 2)), self.y() + int(self.height() / 3), 750, 300)
         if not self.video and os.path.isfile(os.path.join(QDir.tempPath(), MainWindow.TEMP_PROJECT_FILE)):
             self.video = os.path.join(QDir.tempPath(), MainWindow.TEMP_PROJECT_FILE)
-        if self.video:
+        # a leftover journal is offered before any media is opened, loading media starts a fresh journal over it
+        recovered = self.cutter.journal.exists() and self.cutter.recoverJournal()
+        if self.video and not recovered:
             self.file_opener(self.video)
 
     def init_scale(self) -> None:
@@ -346,6 +348,11 @@ class MainWindow(QMainWindow):
                     ]
                 if hasattr(self.cutter, 'mpvWidget'):
                     self.cutter.mpvWidget.shutdown()
+                self.cutter.clipThumbsWorker.stopped = True
+                self.cutter.clipThumbsThread.quit()
+                self.cutter.clipThumbsThread.wait()
+                self.cutter.thumbnailer.terminate()
+                self.cutter.journal.discard()
             except AttributeError:
                 pass
         try:
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#######################################################################
+#
+# VidCutter - media cutter & joiner
+#
+# copyright © 2018 Pete Alexandrou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#######################################################################
+
+import logging
+import os
+import re
+from array import array
+from typing import List
+
+from vidcutter.libs.munch import Munch
+
+try:
+    # noinspection PyPackageRequirements
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class AnalysisStore:
+    """Columnar per-file metrics cache produced by one low resolution decode of the source.
+
+    Video columns are sampled per frame, audio columns per RMS window. Each column is kept as its own .npy file
+    so a store can be memory mapped and queried without reading the columns a detector does not need.
+    """
+    columns = Munch(time='f8', luma='f4', scene='f4', diff='f4', atime='f8', rms='f4')
+    videokeys = Munch(scene='lavfi.scene_score', luma='lavfi.signalstats.YAVG', diff='lavfi.signalstats.YDIF')
+    audiokeys = Munch(rms='lavfi.astats.Overall.RMS_level')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = Munch()
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def available() -> bool:
+        return numpy is not None
+
+    @property
+    def loaded(self) -> bool:
+        return len(self.data) > 0
+
+    def column(self, name: str) -> str:
+        return os.path.join(self.path, '{}.npy'.format(name))
+
+    def exists(self) -> bool:
+        return all(os.path.isfile(self.column(name)) for name in AnalysisStore.columns)
+
+    def load(self) -> bool:
+        self.data.clear()
+        if not AnalysisStore.available() or not self.exists():
+            return False
+        try:
+            for name in AnalysisStore.columns:
+                self.data[name] = numpy.load(self.column(name), mmap_mode='r')
+            # the folder mtime orders eviction from the shared cache budget, so using the store counts as a write
+            os.utime(self.path)
+        except (OSError, ValueError):
+            self.logger.exception('Could not load analysis store: {}'.format(self.path), exc_info=True)
+            self.data.clear()
+        return self.loaded
+
+    def save(self, columns: Munch) -> bool:
+        if not AnalysisStore.available():
+            return False
+        os.makedirs(self.path, exist_ok=True)
+        for name, dtype in AnalysisStore.columns.items():
+            numpy.save(self.column(name), numpy.asarray(columns.get(name, []), dtype=dtype))
+        return self.load()
+
+    @staticmethod
+    def filtergraph(height: int, sample_rate: int, window: float, audio: bool) -> str:
+        video = '[0:v]scale=-2:{0},select=\'gte(scene,0)\',signalstats,{1}[v]'.format(
+            height, ','.join('metadata=print:key={}'.format(key) for key in AnalysisStore.videokeys.values()))
+        if not audio:
+            return video
+        return '{0};[0:a]aresample={1},aformat=channel_layouts=mono,asetnsamples=n={2}:p=0,' \
+               'astats=metadata=1:reset=1,ametadata=print:key={3}[a]' \
+               .format(video, sample_rate, int(sample_rate * window), AnalysisStore.audiokeys.rms)
+
+    @staticmethod
+    def results() -> Munch:
+        return Munch(time=array('d'), luma=array('f'), scene=array('f'), diff=array('f'), atime=array('d'),
+                     rms=array('f'), pts=Munch())
+
+    @staticmethod
+    def parse(job: Munch, line: str) -> None:
+        # video and audio metadata lines interleave, so timestamps are tracked per printing filter instance
+        match = re.search(r'^\[(\S+) @ \S+\] .*pts_time:(\S+)', line)
+        if match:
+            job.results.pts[match.group(1)] = job.start + float(match.group(2))
+            return
+        match = re.search(r'^\[(\S+) @ \S+\] (\S+)=(\S+)', line)
+        if match is None or match.group(1) not in job.results.pts:
+            return
+        pts, key = job.results.pts.pop(match.group(1)), match.group(2)
+        try:
+            value = float(match.group(3))
+        except ValueError:
+            value = -120.0 if key == AnalysisStore.audiokeys.rms else 0.0
+        if key == AnalysisStore.videokeys.scene:
+            job.results.time.append(pts)
+        elif key == AnalysisStore.audiokeys.rms:
+            job.results.atime.append(pts)
+        for name, metric in list(AnalysisStore.videokeys.items()) + list(AnalysisStore.audiokeys.items()):
+            if key == metric:
+                job.results[name].append(value)
+
+    @staticmethod
+    def combine(jobs: List[Munch]) -> Munch:
+        columns = Munch((name, array('d' if dtype == 'f8' else 'f')) for name, dtype in AnalysisStore.columns.items())
+        for job in jobs:
+            frames = min(len(job.results[name]) for name in ('time', 'luma', 'scene', 'diff'))
+            windows = min(len(job.results.atime), len(job.results.rms))
+            for name in ('time', 'luma', 'scene', 'diff'):
+                columns[name].extend(job.results[name][:frames])
+            for name in ('atime', 'rms'):
+                columns[name].extend(job.results[name][:windows])
+        return columns
+
+    def intervals(self, time: str, column: str, threshold: float, end: float, below: bool=True) -> List[list]:
+        times, values = self.data[time], self.data[column]
+        if not len(times):
+            return []
+        mask = (values < threshold) if below else (values >= threshold)
+        edges = numpy.diff(mask.astype(numpy.int8), prepend=0, append=0)
+        starts, stops = numpy.flatnonzero(edges == 1), numpy.flatnonzero(edges == -1)
+        bounds = numpy.append(numpy.asarray(times, dtype='f8'), end)
+        return numpy.stack((bounds[starts], bounds[stops]), axis=1).tolist()
+
+    def peaks(self, column: str, threshold: float) -> List[float]:
+        return numpy.asarray(self.data.time)[numpy.asarray(self.data[column]) >= threshold].tolist()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#######################################################################
+#
+# VidCutter - media cutter & joiner
+#
+# copyright © 2018 Pete Alexandrou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#######################################################################
+
+from typing import List, Optional, Tuple, Union
+
+from PyQt5.QtCore import QTime
+
+try:
+    # noinspection PyPackageRequirements
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Clip:
+    """A single entry of the clip index.
+
+    Times are integer microseconds into the source and end stays None while the clip is still being cut. The
+    thumbnail is referenced by its ThumbnailCache key so a clip holds no image data of its own.
+    """
+    __slots__ = ('start', 'end', 'source', 'chapter', 'thumbkey')
+
+    def __init__(self, start: int, end: Optional[int] = None, source: str = '', chapter: Optional[str] = None,
+                 thumbkey: Optional[str] = None):
+        self.start = start
+        self.end = end
+        self.source = source
+        self.chapter = chapter
+        self.thumbkey = thumbkey
+
+    def __repr__(self) -> str:
+        return 'Clip(start={0}, end={1}, source={2!r}, chapter={3!r})'.format(self.start, self.end, self.source,
+                                                                             self.chapter)
+
+    @staticmethod
+    def usecs(value: Union[QTime, float]) -> int:
+        if isinstance(value, QTime):
+            return value.msecsSinceStartOfDay() * 1000
+        return int(round(value * 1000000))
+
+    @staticmethod
+    def qtime(usecs: int) -> QTime:
+        return QTime(0, 0).addMSecs(int(round(usecs / 1000)))
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    @property
+    def external(self) -> bool:
+        return len(self.source) > 0
+
+    @property
+    def startTime(self) -> QTime:
+        return Clip.qtime(self.start)
+
+    @property
+    def endTime(self) -> Optional[QTime]:
+        return Clip.qtime(self.end) if self.complete else None
+
+    def record(self) -> list:
+        return [self.start, self.end, self.source, self.chapter]
+
+    @staticmethod
+    def times(clips: List['Clip']) -> Tuple:
+        # an unfinished clip ends where it starts so it adds nothing to runtimes
+        if numpy is None:
+            return [clip.start for clip in clips], [clip.start if clip.end is None else clip.end for clip in clips]
+        starts = numpy.fromiter((clip.start for clip in clips), dtype=numpy.int64, count=len(clips))
+        ends = numpy.fromiter((clip.start if clip.end is None else clip.end for clip in clips), dtype=numpy.int64,
+                              count=len(clips))
+        return starts, ends
+
+    @staticmethod
+    def runtime(clips: List['Clip']) -> int:
+        starts, ends = Clip.times(clips)
+        if numpy is None:
+            return sum(end - start for start, end in zip(starts, ends))
+        return int((ends - starts).sum())
+
+    @staticmethod
+    def seconds(clips: List['Clip']) -> Tuple[List[str], List[str]]:
+        starts, ends = Clip.times(clips)
+        if numpy is None:
+            return ['%f' % (start / 1000000) for start in starts], ['%f' % (end / 1000000) for end in ends]
+        return numpy.char.mod('%f', starts / 1000000).tolist(), numpy.char.mod('%f', ends / 1000000).tolist()
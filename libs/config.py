@@ -36,12 +36,37 @@ class Config:
             blackdetect=Munch(
                 min_duration=0.1,
                 default_duration=2.0
+            ),
+            scenedetect=Munch(
+                min_threshold=0.05,
+                max_threshold=1.0,
+                default_threshold=0.3,
+                min_duration=1.0,
+                height=144
+            ),
+            silencedetect=Munch(
+                min_duration=0.1,
+                default_duration=2.0,
+                noise=-35
+            ),
+            freezedetect=Munch(
+                min_duration=1.0,
+                default_duration=10.0,
+                noise=-50,
+                height=144,
+                fps=4
+            ),
+            analysis=Munch(
+                height=144,
+                black_luma=32,
+                sample_rate=8000,
+                window=0.5
             )
         )
 
     @property
     def thumbnails(self) -> dict:
-        return {'INDEX': QSize(100, 70), 'TIMELINE': QSize(105, 60)}
+        return {'INDEX': QSize(100, 70), 'TIMELINE': QSize(105, 60), 'TRICKPLAY': QSize(160, 90)}
 
     @property
     def video_codecs(self) -> list:
@@ -118,6 +143,9 @@ class Streams(Enum):
 
 class VideoFilter(Enum):
     BLACKDETECT = 1
+    SCENEDETECT = 2
+    SILENCEDETECT = 3
+    FREEZEDETECT = 4
 
 
 class VidCutterException(Exception):
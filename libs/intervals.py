@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#######################################################################
+#
+# VidCutter - media cutter & joiner
+#
+# copyright © 2018 Pete Alexandrou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#######################################################################
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterator, List, Tuple
+
+
+class IntervalIndex:
+    """Closed intervals sorted by start, each tagged with the object it belongs to.
+
+    Alongside the ends a running maximum of them is kept. It never decreases, so the first interval able to reach a
+    point and the last one starting before it are both found by bisection and only the entries in between are
+    checked, which keeps point and range queries logarithmic for the mostly disjoint regions of a timeline.
+    """
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.items = []
+        self.reach = []
+        self._bounds = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, Any]]:
+        return iter(zip(self.starts, self.ends, self.items))
+
+    def __contains__(self, item: Any) -> bool:
+        return id(item) in self._bounds
+
+    def clear(self) -> None:
+        self.starts.clear()
+        self.ends.clear()
+        self.items.clear()
+        self.reach.clear()
+        self._bounds.clear()
+
+    def add(self, start: int, end: int, item: Any) -> bool:
+        if self._bounds.get(id(item)) == (start, end):
+            return False
+        self.remove(item)
+        index = bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.items.insert(index, item)
+        self._bounds[id(item)] = (start, end)
+        self._reindex(index)
+        return True
+
+    def remove(self, item: Any) -> bool:
+        bounds = self._bounds.pop(id(item), None)
+        if bounds is None:
+            return False
+        index = bisect_left(self.starts, bounds[0])
+        while self.items[index] is not item:
+            index += 1
+        del self.starts[index], self.ends[index], self.items[index]
+        self._reindex(index)
+        return True
+
+    def overlapping(self, start: int, end: int) -> List[Any]:
+        first, last = bisect_left(self.reach, start), bisect_right(self.starts, end)
+        return [self.items[index] for index in range(first, last) if self.ends[index] >= start]
+
+    def at(self, value: int) -> List[Any]:
+        return self.overlapping(value, value)
+
+    def _reindex(self, index: int) -> None:
+        del self.reach[index:]
+        reach = self.reach[-1] if len(self.reach) else None
+        for end in self.ends[index:]:
+            reach = end if reach is None else max(reach, end)
+            self.reach.append(reach)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#######################################################################
+#
+# VidCutter - media cutter & joiner
+#
+# copyright © 2018 Pete Alexandrou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#######################################################################
+
+import json
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QStandardPaths
+
+from vidcutter.libs.munch import Munch
+
+
+class ProjectJournal:
+    """Append-only log of clip index edits used to restore unsaved work after a crash.
+
+    The journal starts with a snapshot of the media and its clips, every edit then appends a single JSON line. Once
+    enough operations pile up the journal is compacted in the background into a fresh snapshot. Replaying applies
+    the operations after the last snapshot and stops at the first torn line left by a crash.
+    """
+    compactAfter = 256
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation), 'clips.journal')
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.operations = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def reset(self, media: str, clips: list) -> None:
+        self.operations = 0
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._write(Munch(op='snapshot', media=media, clips=clips), None, generation)
+
+    def add(self, index: int, clip: list) -> None:
+        self.append(Munch(op='add', index=index, clip=clip))
+
+    def edit(self, index: int, clip: list) -> None:
+        self.append(Munch(op='edit', index=index, clip=clip))
+
+    def move(self, start: int, index: int) -> None:
+        self.append(Munch(op='move', start=start, index=index))
+
+    def remove(self, index: int) -> None:
+        self.append(Munch(op='remove', index=index))
+
+    def clear(self) -> None:
+        self.append(Munch(op='clear'))
+
+    def append(self, record: Munch) -> None:
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as journal:
+                journal.write('{}\n'.format(json.dumps(record)))
+                journal.flush()
+        except OSError:
+            self.logger.exception('Could not append to clip journal: {}'.format(self.path), exc_info=True)
+            return
+        self.operations += 1
+
+    def compact(self, state: Callable) -> None:
+        # state is only called when compaction is due, it returns the (media, clips) snapshot of the live index
+        if self.operations < ProjectJournal.compactAfter:
+            return
+        media, clips = state()
+        self.operations = 0
+        with self._lock:
+            offset = os.path.getsize(self.path) if self.exists() else 0
+            generation = self._generation
+        threading.Thread(target=self._write,
+                         args=(Munch(op='snapshot', media=media, clips=clips), offset, generation),
+                         daemon=True).start()
+
+    def replay(self) -> Optional[Munch]:
+        if not self.exists():
+            return None
+        state = None
+        with open(self.path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self.logger.warning('Clip journal ends with a torn record, replay stopped there')
+                    break
+                if record['op'] == 'snapshot':
+                    state = Munch(media=record['media'], clips=list(record['clips']))
+                elif state is None:
+                    continue
+                elif record['op'] == 'add':
+                    state.clips.insert(record['index'], record['clip'])
+                elif record['op'] == 'edit' and record['index'] < len(state.clips):
+                    state.clips[record['index']] = record['clip']
+                elif record['op'] == 'move' and record['start'] < len(state.clips):
+                    state.clips.insert(record['index'], state.clips.pop(record['start']))
+                elif record['op'] == 'remove' and record['index'] < len(state.clips):
+                    del state.clips[record['index']]
+                elif record['op'] == 'clear':
+                    state.clips.clear()
+        return state
+
+    def discard(self) -> None:
+        with self._lock:
+            self._generation += 1
+            if self.exists():
+                os.remove(self.path)
+        self.operations = 0
+
+    def _write(self, snapshot: Munch, offset: Optional[int], generation: int) -> None:
+        # with an offset the snapshot was taken while the journal held offset bytes, anything appended since then
+        # is carried over so edits made during a background compaction are not lost. a compaction that finishes
+        # after the journal was reset or discarded belongs to the old journal and is dropped
+        try:
+            with self._lock:
+                if generation != self._generation:
+                    return
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open('{}.part'.format(self.path), 'w', encoding='utf-8') as journal:
+                    journal.write('{}\n'.format(json.dumps(snapshot)))
+                    if offset is not None and self.exists():
+                        with open(self.path, encoding='utf-8') as live:
+                            live.seek(offset)
+                            journal.write(live.read())
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                os.replace('{}.part'.format(self.path), self.path)
+        except OSError:
+            self.logger.exception('Could not write clip journal snapshot: {}'.format(self.path), exc_info=True)
@@ -464,7 +464,6 @@ def _event_loop(event_handle, playback_cond, event_callbacks, message_handlers,
                 name, value, _fmt = pc['name'], pc['value'], pc['format']
 
                 for handler in property_handlers[name]:
-                    print('xn:mpv:handler:name,value:', name, value)
                     handler(name, value)
                     
             if eid == MpvEventID.LOG_MESSAGE and log_handler is not None:
@@ -26,6 +26,7 @@ import locale
 import logging
 import os
 import sys
+import threading
 
 from OpenGL import GL
 
@@ -66,6 +67,12 @@ class mpvWidget(QOpenGLWidget):
     positionChanged = pyqtSignal(float, int)
     durationChanged = pyqtSignal(float, int)
     initialized = pyqtSignal(str)
+    positionPending = pyqtSignal()
+    propertyChanged = pyqtSignal(str, 'PyQt_PyObject')
+
+    observed = ('time-pos', 'estimated-frame-number', 'duration', 'estimated-frame-count', 'eof-reached', 'pause', 'mute',
+                'volume', 'speed', 'video-zoom', 'contrast', 'brightness')
+    coalesced = ('time-pos', 'estimated-frame-number')
 
     def __init__(self, parent=None, file=None, **mpv_opts):
         super(mpvWidget, self).__init__(parent)
@@ -74,6 +81,7 @@ class mpvWidget(QOpenGLWidget):
         #self.mpvError = mpv.MPVError
         self.originalParent = None
         self.logger = logging.getLogger(__name__)
+        self._cache = {}
         locale.setlocale(locale.LC_NUMERIC, 'C')
 
         #xn self.mpv = mpv.Context()       
@@ -111,14 +119,20 @@ class mpvWidget(QOpenGLWidget):
 
         self.frameSwapped.connect(self.swapped, Qt.DirectConnection)
 
-        
+        self._pending = {}
+        self._pendingLock = threading.Lock()
+        self._positionTimer = QTimer(self)
+        self._positionTimer.setSingleShot(True)
+        self._positionTimer.setInterval(max(int(1000 / (qApp.primaryScreen().refreshRate() or 60)), 1))
+        self._positionTimer.timeout.connect(self.flushPosition)
+        self.positionPending.connect(self.on_positionPending, Qt.QueuedConnection)
+        self.propertyChanged.connect(self.on_propertyChanged, Qt.QueuedConnection)
+
         #xn:self.mpv.observe_property('time-pos')
-        self.mpv.observe_property('time-pos', self.eventHandler)
-        
         #xn:self.mpv.observe_property('duration')
-        self.mpv.observe_property('duration', self.eventHandler)
         #xn:self.mpv.observe_property('eof-reached')
-        self.mpv.observe_property('eof-reached', self.eventHandler)
+        for prop in mpvWidget.observed:
+            self.mpv.observe_property(prop, self.eventHandler)
         
         #xn:self.mpv.set_wakeup_callback(self.eventHandler)
         #self.mpv.register_event_callback(self.eventHandler)
@@ -172,60 +186,47 @@ class mpvWidget(QOpenGLWidget):
         else:
             self.update()
 
-    #xn:def eventHandler(self):
     def eventHandler(self, name, value):
-        ##xn:while self.mpv: #need not loop because loop already in libs.mpv._event_loop
-            try:
-                #print('XN:mpvwidget:eventHandler:self,event...:',self, name, value)
-                '''#xn:
-                event = self.mpv.wait_event(.01)
-                
-                if event.id in {mpv.Events.none, mpv.Events.shutdown}:
-                    break
-                elif event.id == mpv.Events.log_message:
-                    event_log = event.data
-                    log_msg = '[%s] %s' % (event_log.prefix, event_log.text.strip())
-                    if event_log.level in (mpv.LogLevels.fatal, mpv.LogLevels.error):
-                        self.logger.critical(log_msg)
-                        if event_log.level == mpv.LogLevels.fatal or 'file format' in event_log.text:
-                            self.parent.errorOccurred.emit(log_msg)
-                            self.parent.initMediaControls(False)
-                    else:
-                        self.logger.info(log_msg)
-                elif event.id == mpv.Events.property_change:
-                    event_prop = event.data
-                    if event_prop.name == 'eof-reached' and event_prop.data:
-                        self.parent.setPlayButton(False)
-                        self.parent.setPosition(0)
-                    elif event_prop.name == 'time-pos':
-                        # if os.getenv('DEBUG', False) or getattr(self.parent, 'verboseLogs', False):
-                        #     self.logger.info('time-pos property event')
-                        self.positionChanged.emit(event_prop.data, self.property('estimated-frame-number'))
-                    elif event_prop.name == 'duration':
-                        # if os.getenv('DEBUG', False) or getattr(self.parent, 'verboseLogs', False):
-                        #     self.logger.info('duration property event')
-                        self.durationChanged.emit(event_prop.data, self.property('estimated-frame-count'))
-                '''
-                #xn: new events handle at property_change
-                
-##                if event['event_id'] == 22: #MpvEventID.PROPERTY_CHANGE:
-##                    pc = event['event']
-##                    name, value, _fmt = pc['name'], pc['value'], pc['format']
-                
-                print('XN:mpvwidget:eventHandler:pc:',name, value)                
-                if name == 'eof-reached' and value:
-                    #xn: open this line will down at the EOF!
-                    self.parent.playMedia()
-                    #self.parent.setPlayButton(False)
-                    self.parent.setPosition(0)
-                elif name == 'time-pos':
-                    self.positionChanged.emit(value, self.property('estimated-frame-number'))
-                elif name == 'duration':
-                    self.durationChanged.emit(value, self.property('estimated-frame-count'))
-                
-            except mpv.MPVError as e:
-                if e.code != -10:
-                    raise e
+        # called on the mpv event thread, so nothing here may touch Qt objects or call back into mpv. playback
+        # position updates are coalesced into a single pending batch, everything else is queued to the GUI thread
+        if name in mpvWidget.coalesced:
+            with self._pendingLock:
+                queued = len(self._pending) > 0
+                self._pending[name] = value
+            if not queued:
+                self.positionPending.emit()
+        else:
+            self.propertyChanged.emit(name, value)
+
+    @pyqtSlot()
+    def on_positionPending(self) -> None:
+        if not self._positionTimer.isActive():
+            self.flushPosition()
+
+    @pyqtSlot()
+    def flushPosition(self) -> None:
+        # at most one position update is forwarded per display refresh however often mpv reports time-pos
+        with self._pendingLock:
+            pending, self._pending = self._pending, {}
+        if not len(pending):
+            return
+        self._cache.update(pending)
+        self._positionTimer.start()
+        if 'time-pos' in pending and pending['time-pos'] is not None:
+            self.positionChanged.emit(pending['time-pos'], self._cache.get('estimated-frame-number') or 0)
+
+    @pyqtSlot(str, 'PyQt_PyObject')
+    def on_propertyChanged(self, name: str, value) -> None:
+        self._cache[name] = value
+        if name == 'eof-reached' and value:
+            self.parent.playMedia()
+            self.parent.setPosition(0)
+        elif name == 'duration' and value is not None:
+            frames = self._cache.get('estimated-frame-count')
+            if frames is None:
+                # only asked for once per file, mpv usually reports the frame count after the duration
+                frames = self.mpv._get_property('estimated-frame-count')
+            self.durationChanged.emit(value, frames or 0)
 
     def showText(self, msg: str, duration: int=5, level: int=0):
         self.mpv.command('show-text', msg, duration * 1000, level)
@@ -270,16 +271,22 @@ class mpvWidget(QOpenGLWidget):
     def option(self, option: str, val):
         if isinstance(val, bool):
             val = 'yes' if val else 'no'
+        self._cache.pop(option, None)
         return self.mpv.set_option(option, val)
         
 
     def property(self, prop: str, val=None):
+        # observed properties are served from the cache the event bridge keeps current, anything else still costs a
+        # synchronous round-trip to mpv. a write drops the cached value until mpv reports the new one
         if val is None:
+            if prop in self._cache:
+                return self._cache[prop]
             #xn:return self.mpv.get_property(prop)
             return self.mpv._get_property(prop)
         else:
             if isinstance(val, bool):
                 val = 'yes' if val else 'no'
+            self._cache.pop(prop, None)
             #xn:return self.mpv.set_property(prop, val)
             return self.mpv._set_property(prop, val)
     def changeEvent(self, event: QEvent) -> None:
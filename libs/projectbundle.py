@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#######################################################################
+#
+# VidCutter - media cutter & joiner
+#
+# copyright © 2018 Pete Alexandrou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#######################################################################
+
+import json
+import logging
+import os
+import zipfile
+from array import array
+from typing import List, Optional
+
+from vidcutter.libs.munch import Munch
+from vidcutter.libs.thumbnails import ThumbnailCache
+
+
+class ProjectBundle:
+    """Sidecar zip saved next to a project holding everything derived from its source media: the probe data, the
+    keyframe index, every cached thumbnail and the trickplay sheet.
+
+    The bundle is tied to the source identity (path, size and mtime), so a modified or replaced source simply
+    invalidates it and the project opens the slow way.
+    """
+    version = 1
+    extension = '.vcc'
+
+    def __init__(self, project: str):
+        self.path = '{0}{1}'.format(os.path.splitext(project)[0], ProjectBundle.extension)
+        self.logger = logging.getLogger(__name__)
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def save(self, identity: str, probe: Munch, keyframes: List[float], cache: ThumbnailCache,
+             trickplay: str) -> bool:
+        manifest = Munch(version=ProjectBundle.version, identity=identity)
+        part = '{}.part'.format(self.path)
+        try:
+            try:
+                with zipfile.ZipFile(part, 'w', zipfile.ZIP_DEFLATED) as bundle:
+                    bundle.writestr('manifest.json', json.dumps(manifest))
+                    bundle.writestr('probe.json', json.dumps(probe.toDict()))
+                    bundle.writestr('keyframes.bin', array('d', keyframes).tobytes())
+                    # JPEG data does not compress any further so thumbnails are stored as they are
+                    for key, data in cache.export(identity).items():
+                        bundle.writestr('thumbnails/{}.jpg'.format(key), data, zipfile.ZIP_STORED)
+                    if os.path.isfile(trickplay):
+                        bundle.write(trickplay, 'trickplay.jpg', zipfile.ZIP_STORED)
+                os.replace(part, self.path)
+            except BaseException:
+                # a half written bundle must not be left lying next to the project
+                if os.path.isfile(part):
+                    os.remove(part)
+                raise
+            return True
+        except (OSError, TypeError, ValueError):
+            self.logger.exception('Could not save project cache bundle: {}'.format(self.path), exc_info=True)
+            return False
+
+    def load(self, identity: str, cache: ThumbnailCache, trickplay: str) -> Optional[Munch]:
+        if not self.exists():
+            return None
+        try:
+            with zipfile.ZipFile(self.path) as bundle:
+                manifest = Munch.fromDict(json.loads(bundle.read('manifest.json').decode()))
+                if manifest.get('version') != ProjectBundle.version or manifest.get('identity') != identity:
+                    self.logger.info('Discarding stale project cache bundle: {}'.format(self.path))
+                    return None
+                keyframes = array('d')
+                keyframes.frombytes(bundle.read('keyframes.bin'))
+                cache.restore({os.path.splitext(os.path.basename(name))[0]: bundle.read(name)
+                               for name in bundle.namelist() if name.startswith('thumbnails/')})
+                if 'trickplay.jpg' in bundle.namelist() and not os.path.isfile(trickplay):
+                    os.makedirs(os.path.dirname(trickplay), exist_ok=True)
+                    cache.trim(os.path.dirname(trickplay))
+                    with open(trickplay, 'wb') as sheet:
+                        sheet.write(bundle.read('trickplay.jpg'))
+                return Munch(probe=Munch.fromDict(json.loads(bundle.read('probe.json').decode())),
+                             keyframes=keyframes.tolist())
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            self.logger.exception('Could not load project cache bundle: {}'.format(self.path), exc_info=True)
+            return None
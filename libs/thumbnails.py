@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#######################################################################
+#
+# VidCutter - media cutter & joiner
+#
+# copyright © 2018 Pete Alexandrou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#######################################################################
+
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from PyQt5.QtCore import QSize, QStandardPaths, Qt
+from PyQt5.QtGui import QImage
+
+try:
+    import vidcutter.libs.mpv as mpv
+except OSError:
+    mpv = None
+
+
+class ThumbnailCache:
+    """Thumbnails shared by the timeline and the clip index, kept in a memory LRU backed by a size capped disk tier.
+
+    Entries are QImages rather than QPixmaps so the cache can be filled and read from thumbnail worker threads.
+    """
+    def __init__(self, entries: int=1024, budget: int=256 * 1024 * 1024):
+        self.entries = entries
+        self.budget = budget
+        self.logger = logging.getLogger(__name__)
+        self._memory = OrderedDict()
+        self._disk = None
+        self._diskbytes = 0
+        self._path = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(identity: str, frametime: float, size: QSize, framerate: float=1000.0) -> str:
+        return '{0}-{1:d}-{2:d}x{3:d}'.format(identity, int(round(frametime * framerate)),
+                                               int(size.width()), int(size.height()))
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            self._path = os.path.join(QStandardPaths.writableLocation(QStandardPaths.CacheLocation), 'thumbnails')
+            os.makedirs(self._path, exist_ok=True)
+        return self._path
+
+    def filename(self, key: str) -> str:
+        return os.path.join(self.path, '{}.jpg'.format(key))
+
+    def get(self, key: str) -> Optional[QImage]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            self._scanDisk()
+            if key not in self._disk:
+                return None
+            image = QImage(self.filename(key), 'JPG')
+            if image.isNull():
+                self._removeDisk(key)
+                return None
+            self._disk.move_to_end(key)
+            os.utime(self.filename(key))
+            self._store(key, image)
+            return image
+
+    def put(self, key: str, image: QImage) -> None:
+        if image is None or image.isNull():
+            return
+        with self._lock:
+            self._store(key, image)
+            self._scanDisk()
+            if key in self._disk:
+                return
+            filename = self.filename(key)
+            if image.save('{}.part'.format(filename), 'JPG', 90):
+                os.replace('{}.part'.format(filename), filename)
+                self._disk[key] = os.path.getsize(filename)
+                self._diskbytes += self._disk[key]
+                while self._diskbytes > self.budget and len(self._disk) > 1:
+                    self._removeDisk(next(iter(self._disk)))
+
+    def export(self, identity: str) -> dict:
+        with self._lock:
+            self._scanDisk()
+            entries = {}
+            for key in self._disk:
+                if key.startswith('{}-'.format(identity)):
+                    with open(self.filename(key), 'rb') as thumb:
+                        entries[key] = thumb.read()
+            return entries
+
+    def restore(self, entries: dict) -> None:
+        # encoded thumbnails go straight into the disk tier, they are only decoded once something asks for them
+        with self._lock:
+            self._scanDisk()
+            for key, data in entries.items():
+                if key in self._disk:
+                    continue
+                with open(self.filename(key), 'wb') as thumb:
+                    thumb.write(data)
+                self._disk[key] = len(data)
+                self._diskbytes += len(data)
+            while self._diskbytes > self.budget and len(self._disk) > 1:
+                self._removeDisk(next(iter(self._disk)))
+
+    def trim(self, path: str, keep: str=None) -> None:
+        # the other per-media caches (analysis columns, trickplay sheets) share the thumbnail byte budget. each entry
+        # is a file or a folder of files and the least recently modified go first, keep is never evicted
+        if not os.path.isdir(path):
+            return
+        entries = []
+        for entry in os.scandir(path):
+            if entry.is_dir():
+                size = sum(child.stat().st_size for child in os.scandir(entry.path) if child.is_file())
+            elif entry.is_file():
+                size = entry.stat().st_size
+            else:
+                continue
+            entries.append((entry.stat().st_mtime, entry.path, size))
+        total = sum(size for mtime, entrypath, size in entries)
+        for mtime, entrypath, size in sorted(entries):
+            if total <= self.budget:
+                break
+            if keep is not None and os.path.abspath(entrypath) == os.path.abspath(keep):
+                continue
+            try:
+                if os.path.isdir(entrypath):
+                    shutil.rmtree(entrypath)
+                else:
+                    os.remove(entrypath)
+                total -= size
+            except OSError:
+                self.logger.warning('Could not evict cache entry: {}'.format(entrypath))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._scanDisk()
+            [self._removeDisk(key) for key in list(self._disk)]
+
+    def _store(self, key: str, image: QImage) -> None:
+        self._memory[key] = image
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.entries:
+            self._memory.popitem(last=False)
+
+    def _scanDisk(self) -> None:
+        if self._disk is not None:
+            return
+        files = []
+        for entry in os.scandir(self.path):
+            if entry.is_file() and entry.name.endswith('.jpg'):
+                info = entry.stat()
+                files.append((info.st_mtime, entry.name[:-4], info.st_size))
+        self._disk = OrderedDict((key, size) for mtime, key, size in sorted(files))
+        self._diskbytes = sum(self._disk.values())
+
+    def _removeDisk(self, key: str) -> None:
+        self._diskbytes -= self._disk.pop(key, 0)
+        try:
+            os.remove(self.filename(key))
+        except OSError:
+            self.logger.warning('Could not remove cached thumbnail: {}'.format(key))
+
+
+class MpvThumbnailer:
+    """Grabs frames through a second mpv instance without video output, which keeps its demuxer and decoder state
+    warm across seeks instead of paying a process start and stream probe per frame.
+    """
+    timeout = 10
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.player = None
+        self.source = None
+        self._restart = threading.Event()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return mpv is not None
+
+    def open(self, source: str) -> bool:
+        if self.player is None:
+            self.player = mpv.MPV(vo='null', ao='null', hwdec='no', pause=True, keep_open='always', idle=True,
+                                  config='no', osd_level=0, sub_auto='no')
+            self.player.initialize()
+            self.player.register_event_callback(self.eventHandler)
+        self._restart.clear()
+        self.player.loadfile(source)
+        self.source = source if self._restart.wait(MpvThumbnailer.timeout) else None
+        return self.source is not None
+
+    def eventHandler(self, event: dict) -> None:
+        if event['event_id'] == mpv.MpvEventID.PLAYBACK_RESTART:
+            self._restart.set()
+
+    def capture(self, source: str, frametime: float, size: QSize, keyframe: bool=False) -> Optional[QImage]:
+        with self._lock:
+            try:
+                if source != self.source and not self.open(source):
+                    return None
+                self._restart.clear()
+                self.player.seek(frametime, 'absolute', 'keyframes' if keyframe else 'exact')
+                if not self._restart.wait(MpvThumbnailer.timeout):
+                    return None
+                res = self.player.node_command('screenshot-raw', 'video')
+            except Exception:
+                self.logger.exception('Could not capture frame at {0} from {1}'.format(frametime, source),
+                                      exc_info=True)
+                return None
+        if res is None or res.get('format') != 'bgr0':
+            return None
+        frame = QImage(res['data'], res['w'], res['h'], res['stride'], QImage.Format_RGB32)
+        return frame.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+    def terminate(self) -> None:
+        with self._lock:
+            if self.player is not None:
+                self.player.terminate()
+            self.player, self.source = None, None
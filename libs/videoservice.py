@@ -23,23 +23,28 @@
 #######################################################################
 
 import errno
+import hashlib
 import logging
+import math
 import os
 import re
 import shlex
 import sys
+from array import array
 from bisect import bisect_left
 from functools import partial
-from typing import List, Optional, Union
+from typing import Callable, List, Optional, Union
 
 from PyQt5.QtCore import (pyqtSignal, pyqtSlot, QDir, QFileInfo, QObject, QProcess, QProcessEnvironment, QSettings,
-                          QSize, QStandardPaths, QStorageInfo, QTemporaryFile, QTime)
-from PyQt5.QtGui import QPainter, QPixmap
+                          QSize, QStandardPaths, QStorageInfo, QTemporaryFile, QThread, QTime)
+from PyQt5.QtGui import QImage, QPainter, QPixmap
 from PyQt5.QtWidgets import QMessageBox, QWidget
 
+from vidcutter.libs.analysis import AnalysisStore
 from vidcutter.libs.config import Config, InvalidMediaException, Streams, ToolNotFoundException
 from vidcutter.libs.ffmetadata import FFMetadata
 from vidcutter.libs.munch import Munch
+from vidcutter.libs.thumbnails import ThumbnailCache
 from vidcutter.libs.widgets import VCMessageBox
 
 try:
@@ -54,13 +59,20 @@ class VideoService(QObject):
     finished = pyqtSignal(bool, str)
     error = pyqtSignal(str)
     addScenes = pyqtSignal(list)
+    analyzed = pyqtSignal(bool)
+    trickplayReady = pyqtSignal(str)
 
     frozen = getattr(sys, 'frozen', False)
     spaceWarningThreshold = 200
+    filterChunkLength = 60
+    filterJoinTolerance = 0.1
+    trickplayInterval = 10
+    trickplayFrames = 1600
     spaceWarningDelivered = False
     smartcutError = False
 
     config = Config()
+    thumbcache = ThumbnailCache()
 
     def __init__(self, settings: QSettings, parent: QWidget):
         super(VideoService, self).__init__(parent)
@@ -76,16 +88,22 @@ class VideoService(QObject):
             self.media, self.source = None, None
             self.chapter_metadata = None
             self.keyframes = []
+            self.scenescores = None
+            self.analysis = AnalysisStore('')
             self.streams = Munch()
             self.mappings = []
         except ToolNotFoundException as e:
             self.logger.exception(e.msg, exc_info=True)
             QMessageBox.critical(getattr(self, 'parent', None), 'Missing libraries', e.msg)
 
-    def setMedia(self, source: str) -> None:
+    def setMedia(self, source: str, media: Munch = None) -> None:
         try:
             self.source = QDir.toNativeSeparators(source)
-            self.media = self.probe(source)
+            self.media = media if media is not None else self.probe(source)
+            self.keyframes, self.scenescores = [], None
+            self.killKeyframeProc()
+            self.analysis = AnalysisStore(VideoService.cachePath('analysis', VideoService.fileIdentity(source)))
+            self.analysis.load()
             if self.media is not None:
                 if getattr(self.parent, 'verboseLogs', False):
                     self.logger.info(self.media)
@@ -149,6 +167,16 @@ class VideoService(QObject):
             p.finished.connect(finish)
         return p
 
+    @staticmethod
+    def fileIdentity(source: str) -> str:
+        info = os.stat(source)
+        identity = '{0}|{1}|{2}'.format(os.path.abspath(source), info.st_size, info.st_mtime_ns)
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def cachePath(*paths: str) -> str:
+        return os.path.join(QStandardPaths.writableLocation(QStandardPaths.CacheLocation), *paths)
+
     def checkDiskSpace(self, path: str) -> None:
         # noinspection PyCallByClass
         if self.spaceWarningDelivered or not QFileInfo.exists(path):
@@ -165,29 +193,68 @@ class VideoService(QObject):
             self.spaceWarningDelivered = True
 
     @staticmethod
-    def captureFrame(settings: QSettings, source: str, frametime: str, thumbsize: QSize=None,
-                     external: bool=False) -> QPixmap:
-        if thumbsize is None:
-            thumbsize = VideoService.config.thumbnails['INDEX']
-        capres = QPixmap()
-        img = QTemporaryFile(os.path.join(QDir.tempPath(), 'XXXXXX.jpg'))
-        if img.open():
-            imagecap = img.fileName()
-            cmd = VideoService.findBackends(settings).ffmpeg
-            tsize = '{0:d}x{1:d}'.format(thumbsize.width(), thumbsize.height())
-            args = '-hide_banner -ss {frametime} -i "{source}" -vframes 1 -s {tsize} -y "{imagecap}"'.format(**locals())
-            proc = VideoService.initProc()
-            if proc.state() == QProcess.NotRunning:
-                proc.start(cmd, shlex.split(args))
-                proc.waitForFinished(-1)
-                if proc.exitStatus() == QProcess.NormalExit and proc.exitCode() == 0:
-                    capres = QPixmap(imagecap, 'JPG')
-                if external:
-                    painter = QPainter(capres)
-                    painter.drawPixmap(0, 0, QPixmap(':/images/external.png', 'PNG'))
-                    painter.end()
-        img.remove()
-        return capres
+    def markExternal(pixmap: QPixmap) -> QPixmap:
+        painter = QPainter(pixmap)
+        painter.drawPixmap(0, 0, QPixmap(':/images/external.png', 'PNG'))
+        painter.end()
+        return pixmap
+
+    @staticmethod
+    def captureFrames(ffmpeg: str, source: str, frametimes: List[float], thumbsize: QSize,
+                      ready: Callable = None, keyframes: bool = False, framerate: float = 25.0) -> List[QImage]:
+        # every frame is seeked as its own input and concatenated through one graph, so a whole filmstrip costs a
+        # single process writing raw RGB frames back to back on stdout. with keyframes set the times are expected
+        # to be keyframe aligned and only keyframes are decoded, so each frame costs a single keyframe decode.
+        # each input is limited to a single frame duration so its demuxer stops right after the frame is read
+        # instead of running on to the end of the file behind the trim
+        width, height = int(thumbsize.width()), int(thumbsize.height())
+        seekopts = '-skip_frame nokey -noaccurate_seek ' if keyframes else ''
+        inputs = ' '.join('{0}-ss {1:.3f} -t {2:.6f} -i "{3}"'.format(seekopts, frametime, 1 / max(framerate, 1),
+                                                                      source) for frametime in frametimes)
+        graph = ';'.join('[{0}:v]trim=end_frame=1,scale={1}:{2},setsar=1[v{0}]'.format(index, width, height)
+                         for index in range(len(frametimes)))
+        graph += ';{0}concat=n={1}:v=1:a=0,setpts=N/TB[out]'.format(
+            ''.join('[v{}]'.format(index) for index in range(len(frametimes))), len(frametimes))
+        args = '-hide_banner -loglevel error {0} -filter_complex "{1}" -map "[out]" -vsync passthrough ' \
+               '-f rawvideo -pix_fmt bgra -'.format(inputs, graph)
+        return VideoService.readFrames(ffmpeg, args, QSize(width, height), ready)
+
+    @staticmethod
+    def readFrames(ffmpeg: str, args: str, size: QSize, ready: Callable = None) -> List[QImage]:
+        # frames are handed to ready as soon as their last byte arrives, so callers can show them while the rest of
+        # the batch is still decoding
+        framebytes = int(size.width()) * int(size.height()) * 4
+        frames, buffer = [], bytearray()
+        proc = VideoService.initProc()
+        proc.setProcessChannelMode(QProcess.SeparateChannels)
+        proc.start(ffmpeg, shlex.split(args))
+        while proc.bytesAvailable() or proc.waitForReadyRead(-1):
+            buffer.extend(proc.readAllStandardOutput().data())
+            complete = len(buffer) - len(buffer) % framebytes
+            if not complete:
+                continue
+            with memoryview(buffer) as view:
+                batch = VideoService.rawFrames(view[:complete], size)
+            del buffer[:complete]
+            for frame in batch:
+                if ready is not None:
+                    ready(len(frames), frame)
+                frames.append(frame)
+        proc.waitForFinished(-1)
+        if proc.exitStatus() != QProcess.NormalExit or proc.exitCode() != 0:
+            logging.getLogger(__name__).error(proc.readAllStandardError().data().decode(errors='replace'))
+        return frames
+
+    @staticmethod
+    def rawFrames(data: memoryview, size: QSize) -> List[QImage]:
+        # the wrapping image only borrows the slice of the python buffer, so each frame is detached into memory owned
+        # by Qt before it can be cached or queued to another thread. that detach is the only copy a frame costs
+        width, height = int(size.width()), int(size.height())
+        framebytes, frames = width * height * 4, []
+        for offset in range(0, len(data) - framebytes + 1, framebytes):
+            chunk = data[offset:offset + framebytes]
+            frames.append(QImage(chunk, width, height, width * 4, QImage.Format_RGB32).copy())
+        return frames
 
     # noinspection PyBroadException
     def testJoin(self, file1: str, file2: str) -> bool:
@@ -247,6 +314,13 @@ class VideoService(QObject):
                                 result, re.DOTALL).groupdict()
             return QSize(int(matches['width']), int(matches['height']))
 
+    def framerate(self) -> float:
+        if hasattr(self.streams, 'video'):
+            num, _, den = str(self.streams.video.get('avg_frame_rate', '0/0')).partition('/')
+            if float(num or 0) > 0 and float(den or 1) > 0:
+                return float(num) / float(den or 1)
+        return 1000.0
+
     def duration(self, source: str = None) -> QTime:
         if source is None and hasattr(self.media, 'format') and self.parent is not None:
             return self.parent.delta2QTime(float(self.media.format.duration))
@@ -521,47 +595,314 @@ class VideoService(QObject):
                 absf = '{} mp3decomp'.format(prefix)
         return vbsf, absf
 
+    def filterChunks(self) -> List[tuple]:
+        duration = float(self.media.format.duration)
+        count = max(1, min(QThread.idealThreadCount(), int(duration / VideoService.filterChunkLength)))
+        length = duration / count
+        return [(index * length, length) for index in range(count)]
+
+    def runFilter(self, filtergraph: str, parser: Callable, finish: Callable, results: Callable = list,
+                  streams: str = '-an -sn -dn -vf', outputopts: str = '') -> None:
+        self.killFilterProc()
+        self.filterprocs, self.filterjobs = [], []
+        for index, (start, length) in enumerate(self.filterChunks()):
+            args = '-hide_banner -nostats -ss {0:.3f} -t {1:.3f} -i "{2}" {3} "{4}" {5}-f null -' \
+                   .format(start, length, os.path.basename(self.source), streams, filtergraph, outputopts)
+            if os.getenv('DEBUG', False) or getattr(self.parent, 'verboseLogs', False):
+                self.logger.info('{0} {1}'.format(self.backends.ffmpeg, args))
+            proc = VideoService.initProc(self.backends.ffmpeg, workingdir=os.path.dirname(self.source))
+            proc.setObjectName('filter.{}'.format(index))
+            proc.setArguments(shlex.split(args))
+            proc.readyReadStandardOutput.connect(partial(self.readFilter, index))
+            proc.finished.connect(partial(self.checkFilter, finish))
+            self.filterprocs.append(proc)
+            self.filterjobs.append(Munch(start=start, end=start + length, parser=parser, buffer='', results=results()))
+        [proc.start() for proc in self.filterprocs]
+
+    def readFilter(self, index: int) -> None:
+        job = self.filterjobs[index]
+        output = job.buffer + self.filterprocs[index].readAllStandardOutput().data().decode(errors='replace')
+        lines = output.split('\n')
+        job.buffer = lines.pop()
+        for line in lines:
+            job.parser(job, line.strip())
+
+    def checkFilter(self, finish: Callable) -> None:
+        if False in [proc.state() == QProcess.NotRunning for proc in self.filterprocs]:
+            return
+        for index, proc in enumerate(self.filterprocs):
+            self.readFilter(index)
+            self.filterjobs[index].parser(self.filterjobs[index], self.filterjobs[index].buffer.strip())
+            if proc.exitStatus() != QProcess.NormalExit or proc.exitCode() != 0:
+                self.logger.error('Error executing: {0} {1}'.format(proc.program(), proc.arguments()))
+                finish(None)
+                return
+        finish(self.filterjobs)
+
+    @staticmethod
+    def mergeIntervals(jobs: List[Munch]) -> List[list]:
+        merged = []
+        for start, end in sorted(interval for job in jobs for interval in job.results):
+            if len(merged) and start - merged[len(merged) - 1][1] <= VideoService.filterJoinTolerance:
+                merged[len(merged) - 1][1] = max(merged[len(merged) - 1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def intervalScenes(self, intervals: List[list], min_duration: float) -> List[list]:
+        scenes = [[QTime(0, 0)]]
+        for start, end in intervals:
+            if end - start >= min_duration:
+                scenes[len(scenes) - 1].append(self.parent.delta2QTime(start))
+                scenes.append([self.parent.delta2QTime(end)])
+        last = scenes[len(scenes) - 1][0]
+        dur = self.duration()
+        if last < dur and (last.msecsTo(dur) / 1000) >= min_duration:
+            scenes[len(scenes) - 1].append(dur)
+        else:
+            scenes.pop()
+        if os.getenv('DEBUG', False) or getattr(self.parent, 'verboseLogs', False):
+            self.logger.info(scenes)
+        return scenes
+
     def blackdetect(self, min_duration: float) -> None:
+        if self.analysis.loaded:
+            black = VideoService.config.filter_settings().analysis.black_luma
+            intervals = self.analysis.intervals('time', 'luma', black, float(self.media.format.duration))
+            self.addScenes.emit(self.intervalScenes(intervals, min_duration))
+            return
         try:
-            args = '-f lavfi -i "movie=\'{0}\',blackdetect=d={1:.1f}[out0]" '.format(os.path.basename(self.source),
-                                                                                     min_duration)
-            args += '-show_entries tags=lavfi.black_start,lavfi.black_end -of default=nw=1 -hide_banner'
-            if os.getenv('DEBUG', False) or getattr(self.parent, 'verboseLogs', False):
-                self.logger.info('{0} {1}'.format(self.backends.ffprobe, args))
-            self.filterproc = VideoService.initProc(self.backends.ffprobe, lambda: self.on_blackdetect(min_duration),
-                                                    os.path.dirname(self.source))
-            self.filterproc.setArguments(shlex.split(args))
-            self.filterproc.start()
+            # detect at the shortest duration allowed so intervals split at chunk boundaries can be joined back up
+            # before the requested minimum duration is applied
+            detect = VideoService.config.filter_settings().blackdetect.min_duration
+            self.runFilter('blackdetect=d={0:.1f}'.format(detect), self.parseBlackdetect,
+                           lambda jobs: self.on_blackdetect(min_duration, jobs))
         except FileNotFoundError:
             self.logger.exception('Could not find media file: {}'.format(self.source), exc_info=True)
             raise
 
-    def on_blackdetect(self, min_duration: float) -> None:
-        if self.filterproc.exitStatus() == QProcess.NormalExit and self.filterproc.exitCode() == 0:
-            scenes = [[QTime(0, 0)]]
-            results = self.filterproc.readAllStandardOutput().data().decode().strip()
-            for line in results.split('\n'):
-                if re.match(r'\[blackdetect @ (.*)\]', line):
-                    vals = line.split(']')[1].strip().split(' ')
-                    start = float(vals[0].replace('black_start:', ''))
-                    end = float(vals[1].replace('black_end:', ''))
-                    dur = float(vals[2].replace('black_duration:', ''))
-                    if dur >= min_duration:
-                        scenes[len(scenes) - 1].append(self.parent.delta2QTime(start))
-                        scenes.append([self.parent.delta2QTime(end)])
-            last = scenes[len(scenes) - 1][0]
-            dur = self.duration()
-            if last < dur and (last.msecsTo(dur) / 1000) >= min_duration:
-                scenes[len(scenes) - 1].append(dur)
-            else:
-                scenes.pop()
-            if os.getenv('DEBUG', False) or getattr(self.parent, 'verboseLogs', False):
-                self.logger.info(scenes)
-            self.addScenes.emit(scenes)
+    @staticmethod
+    def parseBlackdetect(job: Munch, line: str) -> None:
+        match = re.search(r'\[blackdetect @ .*\] black_start:(\S+) black_end:(\S+)', line)
+        if match:
+            job.results.append((job.start + float(match.group(1)), job.start + float(match.group(2))))
+
+    def on_blackdetect(self, min_duration: float, jobs: Optional[List[Munch]]) -> None:
+        if jobs is None:
+            self.addScenes.emit([])
+            return
+        self.addScenes.emit(self.intervalScenes(VideoService.mergeIntervals(jobs), min_duration))
+
+    def scenedetect(self, threshold: float) -> None:
+        if self.analysis.loaded:
+            self.addScenes.emit(self.sceneCuts(self.analysis.peaks('scene', threshold)))
+            return
+        if self.scenescores is not None:
+            self.addScenes.emit(self.sceneCuts(self.sceneCandidates(threshold)))
+            return
+        try:
+            settings = VideoService.config.filter_settings().scenedetect
+            self.runFilter('scale=-2:{0},select=\'gte(scene,0)\',metadata=print:key=lavfi.scene_score'
+                           .format(settings.height),
+                           self.parseScenedetect, lambda jobs: self.on_scenedetect(threshold, jobs),
+                           lambda: Munch(times=array('d'), scores=array('f'), pts=None))
+        except FileNotFoundError:
+            self.logger.exception('Could not find media file: {}'.format(self.source), exc_info=True)
+            raise
+
+    @staticmethod
+    def parseScenedetect(job: Munch, line: str) -> None:
+        match = re.search(r'pts_time:(\S+)', line)
+        if match:
+            job.results.pts = job.start + float(match.group(1))
+            return
+        match = re.search(r'lavfi\.scene_score=(\S+)', line)
+        if match and job.results.pts is not None:
+            job.results.times.append(job.results.pts)
+            job.results.scores.append(float(match.group(1)))
+            job.results.pts = None
+
+    def on_scenedetect(self, threshold: float, jobs: Optional[List[Munch]]) -> None:
+        if jobs is None:
+            self.addScenes.emit([])
+            return
+        times, scores = array('d'), array('f')
+        for job in jobs:
+            times.extend(job.results.times)
+            scores.extend(job.results.scores)
+        self.scenescores = Munch(times=times, scores=scores)
+        self.addScenes.emit(self.sceneCuts(self.sceneCandidates(threshold)))
+
+    def sceneCandidates(self, threshold: float) -> List[float]:
+        return [time for time, score in zip(self.scenescores.times, self.scenescores.scores) if score >= threshold]
+
+    def sceneCuts(self, candidates: List[float]) -> List[list]:
+        min_duration = VideoService.config.filter_settings().scenedetect.min_duration
+        duration = float(self.media.format.duration)
+        points = [0.0]
+        for time in candidates:
+            if time - points[len(points) - 1] >= min_duration and duration - time >= min_duration:
+                points.append(time)
+        points.append(duration)
+        scenes = [[self.parent.delta2QTime(start), self.parent.delta2QTime(end)]
+                  for start, end in zip(points, points[1:])]
+        if os.getenv('DEBUG', False) or getattr(self.parent, 'verboseLogs', False):
+            self.logger.info(scenes)
+        return scenes
+
+    def silencedetect(self, min_duration: float) -> None:
+        if not len(self.streams.audio):
+            self.logger.info('no audio streams found for silencedetect in {}'.format(self.source))
+            self.addScenes.emit([])
+            return
+        if self.analysis.loaded:
+            noise = VideoService.config.filter_settings().silencedetect.noise
+            intervals = self.analysis.intervals('atime', 'rms', noise, float(self.media.format.duration))
+            self.addScenes.emit(self.intervalScenes(intervals, min_duration))
+            return
+        try:
+            settings = VideoService.config.filter_settings().silencedetect
+            self.runFilter('silencedetect=noise={0}dB:d={1:.1f}'.format(settings.noise, settings.min_duration),
+                           self.parseSilencedetect, lambda jobs: self.on_silencedetect(min_duration, jobs),
+                           streams='-vn -sn -dn -af')
+        except FileNotFoundError:
+            self.logger.exception('Could not find media file: {}'.format(self.source), exc_info=True)
+            raise
+
+    @staticmethod
+    def parseSilencedetect(job: Munch, line: str) -> None:
+        match = re.search(r'\[silencedetect @ .*\] silence_(start|end): (\S+)', line)
+        if match:
+            if match.group(1) == 'start':
+                job.pending = job.start + max(float(match.group(2)), 0.0)
+            elif job.get('pending') is not None:
+                job.results.append((job.pending, job.start + float(match.group(2))))
+                job.pending = None
+
+    @staticmethod
+    def closeIntervals(jobs: List[Munch]) -> List[Munch]:
+        for job in jobs:
+            if job.get('pending') is not None:
+                job.results.append((job.pending, job.end))
+                job.pending = None
+        return jobs
+
+    def on_silencedetect(self, min_duration: float, jobs: Optional[List[Munch]]) -> None:
+        if jobs is None:
+            self.addScenes.emit([])
+            return
+        intervals = VideoService.mergeIntervals(VideoService.closeIntervals(jobs))
+        self.addScenes.emit(self.intervalScenes(intervals, min_duration))
+
+    def freezedetect(self, min_duration: float) -> None:
+        if self.analysis.loaded:
+            # freezedetect noise is a normalised mean absolute frame difference, YDIF is the same on an 8-bit scale
+            noise = VideoService.config.filter_settings().freezedetect.noise
+            intervals = self.analysis.intervals('time', 'diff', 255 * 10 ** (noise / 20),
+                                                float(self.media.format.duration))
+            self.addScenes.emit(self.intervalScenes(intervals, min_duration))
+            return
+        try:
+            # every frame is decoded but only a few a second are scaled and compared, so motion between keyframes
+            # still breaks a freeze while multi-day recordings stay cheap to scan
+            settings = VideoService.config.filter_settings().freezedetect
+            self.runFilter('fps={0},scale=-2:{1},freezedetect=n={2}dB:d={3:.1f}'
+                           .format(settings.fps, settings.height, settings.noise, settings.min_duration),
+                           self.parseFreezedetect, lambda jobs: self.on_freezedetect(min_duration, jobs))
+        except FileNotFoundError:
+            self.logger.exception('Could not find media file: {}'.format(self.source), exc_info=True)
+            raise
+
+    @staticmethod
+    def parseFreezedetect(job: Munch, line: str) -> None:
+        match = re.search(r'\[freezedetect @ .*\] lavfi\.freezedetect\.freeze_(start|end): (\S+)', line)
+        if match:
+            if match.group(1) == 'start':
+                job.pending = job.start + max(float(match.group(2)), 0.0)
+            elif job.get('pending') is not None:
+                job.results.append((job.pending, job.start + float(match.group(2))))
+                job.pending = None
+
+    def on_freezedetect(self, min_duration: float, jobs: Optional[List[Munch]]) -> None:
+        if jobs is None:
+            self.addScenes.emit([])
+            return
+        intervals = VideoService.mergeIntervals(VideoService.closeIntervals(jobs))
+        self.addScenes.emit(self.intervalScenes(intervals, min_duration))
+
+    def analyze(self) -> None:
+        try:
+            # one low resolution decode records every metric the detectors need, after which they only query the store
+            settings = VideoService.config.filter_settings().analysis
+            audio = len(self.streams.audio) > 0
+            outputopts = '-map "[v]" -map "[a]" ' if audio else '-map "[v]" '
+            self.runFilter(AnalysisStore.filtergraph(settings.height, settings.sample_rate, settings.window, audio),
+                           AnalysisStore.parse, self.on_analyze, AnalysisStore.results,
+                           streams='-sn -dn -filter_complex', outputopts=outputopts)
+        except FileNotFoundError:
+            self.logger.exception('Could not find media file: {}'.format(self.source), exc_info=True)
+            raise
+
+    def on_analyze(self, jobs: Optional[List[Munch]]) -> None:
+        if jobs is None:
+            self.analyzed.emit(False)
+            return
+        VideoService.thumbcache.trim(VideoService.cachePath('analysis'), self.analysis.path)
+        self.analyzed.emit(self.analysis.save(AnalysisStore.combine(jobs)))
+
+    def trickplayLayout(self) -> Munch:
+        duration = float(self.media.format.duration)
+        interval = max(VideoService.trickplayInterval, int(math.ceil(duration / VideoService.trickplayFrames)))
+        count = max(1, int(math.ceil(duration / interval)))
+        columns = int(math.ceil(math.sqrt(count)))
+        framesize = self.framesize()
+        height = VideoService.config.thumbnails['TRICKPLAY'].height()
+        width = int(round(height * framesize.width() / max(framesize.height(), 1) / 2)) * 2
+        return Munch(interval=interval, columns=columns, rows=int(math.ceil(count / columns)),
+                     size=QSize(width, height),
+                     path=VideoService.trickplayPath(self.source))
+
+    @staticmethod
+    def trickplayPath(source: str) -> str:
+        return VideoService.cachePath('trickplay', '{}.jpg'.format(VideoService.fileIdentity(source)))
+
+    def buildTrickplay(self) -> None:
+        # one keyframe-only pass tiles a small frame every interval seconds into a single sprite sheet, which the
+        # timeline crops hover previews from without decoding anything
+        self.killTrickplayProc()
+        layout = self.trickplayLayout()
+        if os.path.isfile(layout.path):
+            os.utime(layout.path)
+            self.trickplayReady.emit(layout.path)
+            return
+        os.makedirs(os.path.dirname(layout.path), exist_ok=True)
+        VideoService.thumbcache.trim(os.path.dirname(layout.path))
+        args = '-hide_banner -loglevel error -skip_frame nokey -i "{0}" -an -sn -dn ' \
+               '-vf "fps=1/{1},scale={2}:{3},tile={4}x{5}" -frames:v 1 -q:v 5 -c:v mjpeg -f image2 -y "{6}.part"' \
+               .format(self.source, layout.interval, layout.size.width(), layout.size.height(), layout.columns,
+                       layout.rows, layout.path)
+        self.trickproc = VideoService.initProc(self.backends.ffmpeg, lambda code, status: self.on_trickplay(layout))
+        self.trickproc.setArguments(shlex.split(args))
+        self.trickproc.start()
+
+    def on_trickplay(self, layout: Munch) -> None:
+        if self.trickproc.exitStatus() == QProcess.NormalExit and self.trickproc.exitCode() == 0 \
+                and os.path.isfile('{}.part'.format(layout.path)):
+            os.replace('{}.part'.format(layout.path), layout.path)
+            self.trickplayReady.emit(layout.path)
+        else:
+            self.logger.error('Could not build trickplay sprite sheet for {}'.format(self.source))
+
+    def killTrickplayProc(self) -> None:
+        if getattr(self, 'trickproc', None) is not None and self.trickproc.state() != QProcess.NotRunning:
+            self.trickproc.finished.disconnect()
+            self.trickproc.kill()
 
     def killFilterProc(self) -> None:
-        if hasattr(self, 'filterproc') and self.filterproc.state() != QProcess.NotRunning:
-            self.filterproc.kill()
+        for proc in getattr(self, 'filterprocs', []):
+            if proc.state() != QProcess.NotRunning:
+                proc.finished.disconnect()
+                proc.kill()
 
     def probe(self, source: str) -> Munch:
         try:
@@ -575,32 +916,83 @@ class VideoService(QObject):
             self.logger.exception('FFprobe JSON decoding error', exc_info=True)
             raise
 
+    @staticmethod
+    def keyframeArgs(source: str) -> str:
+        return '-v error -select_streams v:0 -show_entries packet=pts_time,flags -of csv=p=0 "{}"'.format(source)
+
+    @staticmethod
+    def parseKeyframes(output: str) -> List[float]:
+        keyframes = []
+        for line in output.split('\n'):
+            fields = line.strip().split(',')
+            if len(fields) > 1 and 'K' in fields[1] and fields[0] != 'N/A':
+                keyframes.append(float(fields[0]))
+        return sorted(keyframes)
+
+    @staticmethod
+    def keyframeTimes(ffprobe: str, source: str) -> List[float]:
+        proc = VideoService.initProc()
+        proc.setProcessChannelMode(QProcess.SeparateChannels)
+        proc.start(ffprobe, shlex.split(VideoService.keyframeArgs(source)))
+        proc.waitForFinished(-1)
+        return VideoService.parseKeyframes(proc.readAllStandardOutput().data().decode(errors='replace'))
+
+    def scanKeyframes(self) -> None:
+        # fills the keyframe index in the background for callers that can make do without it until it is ready
+        if len(self.keyframes) or self.source is None \
+                or (getattr(self, 'keyproc', None) is not None and self.keyproc.state() != QProcess.NotRunning):
+            return
+        source = self.source
+        self.keyproc = VideoService.initProc(self.backends.ffprobe, lambda code, status: self.on_keyframes(source))
+        self.keyproc.setProcessChannelMode(QProcess.SeparateChannels)
+        self.keyproc.setArguments(shlex.split(VideoService.keyframeArgs(source)))
+        self.keyproc.start()
+
+    def on_keyframes(self, source: str) -> None:
+        if self.keyproc.exitStatus() == QProcess.NormalExit and self.keyproc.exitCode() == 0:
+            self.setKeyframes(source, VideoService.parseKeyframes(
+                self.keyproc.readAllStandardOutput().data().decode(errors='replace')))
+        else:
+            self.logger.error('Could not scan keyframes of {}'.format(source))
+
+    def killKeyframeProc(self) -> None:
+        if getattr(self, 'keyproc', None) is not None and self.keyproc.state() != QProcess.NotRunning:
+            self.keyproc.finished.disconnect()
+            self.keyproc.kill()
+
+    @staticmethod
+    def snapKeyframe(keyframes: List[float], frametime: float) -> float:
+        if not len(keyframes):
+            return frametime
+        index = bisect_left(keyframes, frametime)
+        candidates = keyframes[max(index - 1, 0):index + 1]
+        return min(candidates, key=lambda keyframe: abs(keyframe - frametime))
+
     def getKeyframes(self, source: str, formatted_time: bool = False) -> list:
+        # the current media has a single keyframe index, filled by whichever of smartcut, timeline thumbnailing,
+        # scrubbing or a project cache bundle asks for it first
         if len(self.keyframes) and source == self.source:
-            return self.keyframes
-        timecode = '0:00:00.000000' if formatted_time else 0
-        args = '-v error -show_packets -select_streams v -show_entries packet=pts_time,flags ' \
-               '{0}-of csv "{1}"'.format('-sexagesimal ' if formatted_time else '', source)
-        result = self.cmdExec(self.backends.ffprobe, args, output=True, suppresslog=True, mergechannels=False)
-        keyframe_times = []
-        for line in result.split('\n'):
-            if line.split(',')[1] != 'N/A':
-                timecode = line.split(',')[1]
-            if re.search(',K', line):
-                if formatted_time:
-                    keyframe_times.append(timecode[:-3])
-                else:
-                    keyframe_times.append(float(timecode))
+            keyframe_times = list(self.keyframes)
+        else:
+            keyframe_times = VideoService.keyframeTimes(self.backends.ffprobe, source)
+            if source == self.source:
+                self.keyframes = list(keyframe_times)
         #xn:last_keyframe = self.duration().toString('h:mm:ss.zzz')
         last_keyframe = (self.duration().hour() * 3600000 + self.duration().minute() * 60000
                 + self.duration().second() * 1000 + self.duration().msec())/1000
 
-        if keyframe_times[-1] != last_keyframe:
+        if not len(keyframe_times) or keyframe_times[-1] != last_keyframe:
             keyframe_times.append(last_keyframe)
-        if source == self.source and not formatted_time:
-            self.keyframes = keyframe_times
+        if formatted_time:
+            return ['{0:d}:{1:02d}:{2:06.3f}'.format(int(keyframe // 3600), int(keyframe % 3600 // 60), keyframe % 60)
+                    for keyframe in keyframe_times]
         return keyframe_times
 
+    @pyqtSlot(str, list)
+    def setKeyframes(self, source: str, keyframes: list) -> None:
+        if QDir.toNativeSeparators(source) == self.source:
+            self.keyframes = list(keyframes)
+
     def getGOPbisections(self, source: str, start: float, end: float) -> dict:
         keyframes = self.getKeyframes(source)
         print('xn:videoservice:keyframes:', keyframes)
@@ -32,6 +32,7 @@ from PyQt5.QtWidgets import (qApp, QButtonGroup, QCheckBox, QDialog, QDialogButt
                              QListWidgetItem, QMessageBox, QPushButton, QRadioButton, QSizePolicy, QSpacerItem,
                              QStackedWidget, QStyleFactory, QVBoxLayout, QWidget)
 
+from vidcutter.libs.thumbnails import MpvThumbnailer
 from vidcutter.libs.videoservice import VideoService
 
 
@@ -564,6 +565,79 @@ class GeneralPage(QWidget):
         keepClipsLabel.setObjectName('keepclipslabel')
         keepClipsLabel.setTextFormat(Qt.RichText)
         keepClipsLabel.setWordWrap(True)
+        keyframeThumbsCheckbox = QCheckBox('关键帧缩略图', self)     #Keyframe thumbnails
+        keyframeThumbsCheckbox.setToolTip('时间线缩略图对齐到最近的关键帧')     #Snap timeline thumbnails to the nearest keyframe
+        keyframeThumbsCheckbox.setCursor(Qt.PointingHandCursor)
+        keyframeThumbsCheckbox.setChecked(self.parent.parent.keyframeThumbs)
+        keyframeThumbsCheckbox.stateChanged.connect(self.keyframeThumbs)
+        keyframeThumbsLabel = QLabel('''
+            <b>ON:</b> 每个缩略图只解码一个关键帧，长GOP视频（如HEVC）的时间线加载更快
+            <br/>
+            <b>OFF:</b> 缩略图精确显示其在时间线上的位置
+        ''', self)
+        #   <b>ON:</b> each thumbnail decodes a single keyframe, timelines of long-GOP media (e.g. HEVC) load faster
+        #   <br/>
+        #   <b>OFF:</b> thumbnails show exactly their position on the timeline
+        #''', self)
+
+        keyframeThumbsLabel.setObjectName('keyframethumbslabel')
+        keyframeThumbsLabel.setTextFormat(Qt.RichText)
+        keyframeThumbsLabel.setWordWrap(True)
+        mpvThumbsCheckbox = QCheckBox('使用mpv生成缩略图', self)     #Generate thumbnails with mpv
+        mpvThumbsCheckbox.setToolTip('使用第二个无画面的mpv实例抓取缩略图')     #Grab thumbnails with a second, headless mpv instance
+        mpvThumbsCheckbox.setCursor(Qt.PointingHandCursor)
+        mpvThumbsCheckbox.setChecked(self.parent.parent.mpvThumbs)
+        mpvThumbsCheckbox.setEnabled(MpvThumbnailer.available())
+        mpvThumbsCheckbox.stateChanged.connect(self.mpvThumbs)
+        mpvThumbsLabel = QLabel('''
+            <b>ON:</b> mpv在多次跳转之间保持解码器状态，不必为每个缩略图启动一个FFmpeg进程
+            <br/>
+            <b>OFF:</b> 使用FFmpeg生成缩略图
+        ''', self)
+        #   <b>ON:</b> mpv keeps its decoder state between seeks instead of starting an FFmpeg process per thumbnail
+        #   <br/>
+        #   <b>OFF:</b> generate thumbnails with FFmpeg
+        #''', self)
+
+        mpvThumbsLabel.setObjectName('mpvthumbslabel')
+        mpvThumbsLabel.setTextFormat(Qt.RichText)
+        mpvThumbsLabel.setWordWrap(True)
+        projectCacheCheckbox = QCheckBox('项目缓存包', self)     #Project cache bundle
+        projectCacheCheckbox.setToolTip('在项目文件旁保存媒体信息、关键帧和缩略图')     #Save media info, keyframes and thumbnails next to the project file
+        projectCacheCheckbox.setCursor(Qt.PointingHandCursor)
+        projectCacheCheckbox.setChecked(self.parent.parent.projectCache)
+        projectCacheCheckbox.stateChanged.connect(self.projectCache)
+        projectCacheLabel = QLabel('''
+            <b>ON:</b> 保存项目时写入一个.vcc缓存包，重新打开项目时无需重新分析媒体
+            <br/>
+            <b>OFF:</b> 每次打开项目都重新分析媒体并生成缩略图
+        ''', self)
+        #   <b>ON:</b> write a .vcc cache bundle when saving so reopening the project skips media analysis
+        #   <br/>
+        #   <b>OFF:</b> analyze the media and generate thumbnails every time a project is opened
+        #''', self)
+
+        projectCacheLabel.setObjectName('projectcachelabel')
+        projectCacheLabel.setTextFormat(Qt.RichText)
+        projectCacheLabel.setWordWrap(True)
+        hoverPreviewsCheckbox = QCheckBox('时间线悬停预览', self)     #Timeline hover previews
+        hoverPreviewsCheckbox.setToolTip('鼠标悬停在时间线上时显示该位置的画面')     #Show the frame under the mouse when hovering the timeline
+        hoverPreviewsCheckbox.setCursor(Qt.PointingHandCursor)
+        hoverPreviewsCheckbox.setChecked(self.parent.parent.hoverPreviews)
+        hoverPreviewsCheckbox.stateChanged.connect(self.hoverPreviews)
+        hoverPreviewsLabel = QLabel('''
+            <b>ON:</b> 时间线缩略图生成后在后台扫描一遍媒体，生成悬停预览图
+            <br/>
+            <b>OFF:</b> 不扫描，适合超长的媒体文件
+        ''', self)
+        #   <b>ON:</b> scan the media once in the background after the timeline thumbnails to build hover previews
+        #   <br/>
+        #   <b>OFF:</b> skip the scan, better suited to very long media
+        #''', self)
+
+        hoverPreviewsLabel.setObjectName('hoverpreviewslabel')
+        hoverPreviewsLabel.setTextFormat(Qt.RichText)
+        hoverPreviewsLabel.setWordWrap(True)
         self.singleInstance = self.parent.settings.value('singleInstance', 'on', type=str) in {'on', 'true'} 
         singleInstanceCheckbox = QCheckBox('只允许一个运行实例', self)        #Allow only one running instance
         singleInstanceCheckbox.setToolTip('只允许一个 {} 实例运行'
@@ -594,6 +668,18 @@ class GeneralPage(QWidget):
         generalLayout.addWidget(keepClipsCheckbox)
         generalLayout.addWidget(keepClipsLabel)
         generalLayout.addLayout(SettingsDialog.lineSeparator())
+        generalLayout.addWidget(keyframeThumbsCheckbox)
+        generalLayout.addWidget(keyframeThumbsLabel)
+        generalLayout.addLayout(SettingsDialog.lineSeparator())
+        generalLayout.addWidget(mpvThumbsCheckbox)
+        generalLayout.addWidget(mpvThumbsLabel)
+        generalLayout.addLayout(SettingsDialog.lineSeparator())
+        generalLayout.addWidget(projectCacheCheckbox)
+        generalLayout.addWidget(projectCacheLabel)
+        generalLayout.addLayout(SettingsDialog.lineSeparator())
+        generalLayout.addWidget(hoverPreviewsCheckbox)
+        generalLayout.addWidget(hoverPreviewsLabel)
+        generalLayout.addLayout(SettingsDialog.lineSeparator())
         generalLayout.addWidget(singleInstanceCheckbox)
         generalLayout.addWidget(singleInstanceLabel)
         generalGroup = QGroupBox('通用')             #General
@@ -669,6 +755,35 @@ class GeneralPage(QWidget):
         self.parent.parent.saveSetting('keepClips', state == Qt.Checked)
         self.parent.parent.keepClips = (state == Qt.Checked)
 
+    @pyqtSlot(int)
+    def keyframeThumbs(self, state: int) -> None:
+        self.parent.parent.saveSetting('keyframeThumbs', state == Qt.Checked)
+        self.parent.parent.keyframeThumbs = (state == Qt.Checked)
+        self.parent.parent.seekSlider.reloadThumbs()
+
+    @pyqtSlot(int)
+    def mpvThumbs(self, state: int) -> None:
+        self.parent.parent.saveSetting('mpvThumbs', state == Qt.Checked)
+        self.parent.parent.mpvThumbs = (state == Qt.Checked)
+        if state != Qt.Checked:
+            self.parent.parent.thumbnailer.terminate()
+
+    @pyqtSlot(int)
+    def projectCache(self, state: int) -> None:
+        self.parent.parent.saveSetting('projectCache', state == Qt.Checked)
+        self.parent.parent.projectCache = (state == Qt.Checked)
+
+    @pyqtSlot(int)
+    def hoverPreviews(self, state: int) -> None:
+        self.parent.parent.saveSetting('hoverPreviews', state == Qt.Checked)
+        self.parent.parent.hoverPreviews = (state == Qt.Checked)
+        self.parent.parent.trickplayPending = (state == Qt.Checked)
+        if state == Qt.Checked:
+            self.parent.parent.buildTrickplay()
+        else:
+            self.parent.parent.videoService.killTrickplayProc()
+            self.parent.parent.seekSlider.setTrickplay('')
+
     def setSpinnerValue(self, box_id: int, val: float) -> None:
         self.parent.settings.setValue('level{}Seek'.format(box_id), val)
         if box_id == 1:
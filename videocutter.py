@@ -26,17 +26,16 @@ import logging
 import os
 import re
 import sys
-import time
 from datetime import timedelta
 from functools import partial
 from typing import Callable, List, Optional, Union
 
-from PyQt5.QtCore import (pyqtSignal, pyqtSlot, QBuffer, QByteArray, QDir, QFile, QFileInfo, QModelIndex, QPoint, QSize,
-                          Qt, QTextStream, QTime, QTimer, QUrl)
+from PyQt5.QtCore import (pyqtSignal, pyqtSlot, QBuffer, QByteArray, QDir, QFile, QFileInfo, QItemSelectionModel,
+                          QModelIndex, QPoint, QSize, Qt, QTextStream, QThread, QTime, QTimer, QUrl)
 from PyQt5.QtGui import QDesktopServices, QFont, QFontDatabase, QIcon, QKeyEvent, QPixmap, QShowEvent
 from PyQt5.QtWidgets import (QAction, qApp, QApplication, QDialog, QFileDialog, QFrame, QGroupBox, QHBoxLayout, QLabel,
-                             QListWidgetItem, QMainWindow, QMenu, QMessageBox, QPushButton, QSizePolicy, QStyleFactory,
-                             QVBoxLayout, QWidget)
+                             QMainWindow, QMenu, QMessageBox, QPushButton, QSizePolicy, QStyleFactory, QVBoxLayout,
+                             QWidget)
 
 import sip
 
@@ -48,16 +47,21 @@ from vidcutter.mediainfo import MediaInfo
 from vidcutter.mediastream import StreamSelector
 from vidcutter.settings import SettingsDialog
 from vidcutter.updater import Updater
-from vidcutter.videolist import VideoList
+from vidcutter.videolist import ClipThumbWorker, VideoList
 from vidcutter.videoslider import VideoSlider
 from vidcutter.videosliderwidget import VideoSliderWidget
 from vidcutter.videostyle import VideoStyleDark, VideoStyleLight
 
+from vidcutter.libs.analysis import AnalysisStore
+from vidcutter.libs.clip import Clip
 from vidcutter.libs.config import Config, InvalidMediaException, VideoFilter
+from vidcutter.libs.journal import ProjectJournal
 from vidcutter.libs.mpvwidget import mpvWidget
 from vidcutter.libs.munch import Munch
 from vidcutter.libs.notifications import JobCompleteNotification
+from vidcutter.libs.projectbundle import ProjectBundle
 from vidcutter.libs.taskbarprogress import TaskbarProgress
+from vidcutter.libs.thumbnails import MpvThumbnailer
 from vidcutter.libs.videoservice import VideoService
 from vidcutter.libs.widgets import (ClipErrorsDialog, VCBlinkText, VCDoubleInputDialog, VCFilterMenuAction,
                                     VCFrameCounter, VCInputDialog, VCMessageBox, VCProgressDialog, VCTimeCounter,
@@ -90,7 +94,9 @@ class VideoCutter(QWidget):
         self.updater = Updater(self.parent)
 
         self.seekSlider = VideoSlider(self)
-        self.seekSlider.sliderMoved.connect(self.setPosition)
+        self.seekSlider.sliderMoved.connect(self.scrubPosition)
+        self.seekSlider.sliderReleased.connect(self.endScrub)
+        self.scrubKeyframe = None
         self.sliderWidget = VideoSliderWidget(self, self.seekSlider)
         self.sliderWidget.setLoader(True)
 
@@ -98,6 +104,7 @@ class VideoCutter(QWidget):
 
         self.clipTimes = []
         self.inCut, self.newproject = False, False
+        self.mediaLoading, self.selectPending = False, False
         self.finalFilename = ''
         self.totalRuntime, self.frameRate = 0, 0
         self.notifyInterval = 1000
@@ -111,6 +118,16 @@ class VideoCutter(QWidget):
         self.nativeDialogs = self.settings.value('nativeDialogs', 'on', type=str) in {'on', 'true'}
         self.indexLayout = self.settings.value('indexLayout', 'right', type=str)
         self.timelineThumbs = self.settings.value('timelineThumbs', 'on', type=str) in {'on', 'true'}
+        self.keyframeThumbs = self.settings.value('keyframeThumbs', 'on', type=str) in {'on', 'true'}
+        self.mpvThumbs = self.settings.value('mpvThumbs', 'off', type=str) in {'on', 'true'} \
+            and MpvThumbnailer.available()
+        self.thumbnailer = MpvThumbnailer()
+        self.projectCache = self.settings.value('projectCache', 'on', type=str) in {'on', 'true'}
+        self.hoverPreviews = self.settings.value('hoverPreviews', 'on', type=str) in {'on', 'true'}
+        self.trickplayPending = False
+        self.journal = ProjectJournal()
+        self.clipPlaceholder = QPixmap(VideoService.config.thumbnails['INDEX'])
+        self.clipPlaceholder.fill(Qt.black)
         self.showConsole = self.settings.value('showConsole', 'off', type=str) in {'on', 'true'}
         self.smartcut = self.settings.value('smartcut', 'off', type=str) in {'on', 'true'}
         self.level1Seek = self.settings.value('level1Seek', 2, type=float)
@@ -123,6 +140,8 @@ class VideoCutter(QWidget):
         self.videoService.finished.connect(self.smartmonitor)
         self.videoService.error.connect(self.completeOnError)
         self.videoService.addScenes.connect(self.addScenes)
+        self.videoService.trickplayReady.connect(self.seekSlider.setTrickplay)
+        self.videoService.analyzed.connect(self.on_analyzed)
 
         self.project_files = {
             'edl': re.compile(r'(\d+(?:\.?\d+)?)\t(\d+(?:\.?\d+)?)\t([01])'),
@@ -140,11 +159,21 @@ class VideoCutter(QWidget):
 
         self.cliplist = VideoList(self)
         self.cliplist.customContextMenuRequested.connect(self.itemMenu)
-        self.cliplist.currentItemChanged.connect(self.selectClip)
+        self.cliplist.selectionModel().currentChanged.connect(self.selectClip)
+        self.cliplist.model().thumbsRequested.connect(self.captureClipImages)
+        self.clipThumbsThread = QThread(self)
+        self.clipThumbsWorker = ClipThumbWorker()
+        self.clipThumbsWorker.moveToThread(self.clipThumbsThread)
+        self.clipThumbsWorker.imageReady.connect(self.setClipImage)
+        self.clipThumbsThread.start()
         self.cliplist.model().rowsInserted.connect(self.setProjectDirty)
         self.cliplist.model().rowsRemoved.connect(self.setProjectDirty)
         self.cliplist.model().rowsMoved.connect(self.setProjectDirty)
         self.cliplist.model().rowsMoved.connect(self.syncClipList)
+        self.cliplist.model().rowsInserted.connect(self.seekSlider.on_clipsInserted)
+        self.cliplist.model().rowsAboutToBeRemoved.connect(self.seekSlider.on_clipsRemoved)
+        self.cliplist.model().dataChanged.connect(self.seekSlider.on_clipsChanged)
+        self.cliplist.model().modelReset.connect(self.seekSlider.on_clipsReset)
 
         self.listHeaderButtonL = QPushButton(self)
         self.listHeaderButtonL.setObjectName('listheaderbutton-left')
@@ -613,8 +642,55 @@ class VideoCutter(QWidget):
             self.blackdetectAction.triggered.connect(lambda: self.configFilters(VideoFilter.BLACKDETECT),
                                                      Qt.DirectConnection)
         self.blackdetectAction.setEnabled(False)
+        self.scenedetectAction = VCFilterMenuAction(QPixmap(':/images/blackdetect.png'), '场景检测',#'SCENEDETECT'
+                                                    '通过场景变化检测创建剪辑，',#'Create clips via scene change detection'
+                                                    '有助于检测非黑色画面之间的硬切换',# 'Useful for detecting hard cuts between non-black scenes'
+                                                    self)
+        if sys.platform == 'darwin':
+            self.scenedetectAction.triggered.connect(lambda: self.configFilters(VideoFilter.SCENEDETECT),
+                                                     Qt.QueuedConnection)
+        else:
+            self.scenedetectAction.triggered.connect(lambda: self.configFilters(VideoFilter.SCENEDETECT),
+                                                     Qt.DirectConnection)
+        self.scenedetectAction.setEnabled(False)
+        self.silencedetectAction = VCFilterMenuAction(QPixmap(':/images/blackdetect.png'), '静音检测',#'SILENCEDETECT'
+                                                      '通过音频静音检测创建剪辑，',#'Create clips via audio silence detection'
+                                                      '只解码音频，适合讲座和会议录像',# 'Decodes audio only, ideal for lectures and meetings'
+                                                      self)
+        if sys.platform == 'darwin':
+            self.silencedetectAction.triggered.connect(lambda: self.configFilters(VideoFilter.SILENCEDETECT),
+                                                       Qt.QueuedConnection)
+        else:
+            self.silencedetectAction.triggered.connect(lambda: self.configFilters(VideoFilter.SILENCEDETECT),
+                                                       Qt.DirectConnection)
+        self.silencedetectAction.setEnabled(False)
+        self.freezedetectAction = VCFilterMenuAction(QPixmap(':/images/blackdetect.png'), '静止检测',#'FREEZEDETECT'
+                                                     '通过静止画面检测创建剪辑，',#'Create clips via frozen frame detection'
+                                                     '一键去除监控录像中的静止片段',# 'Drops static segments from surveillance footage in one click'
+                                                     self)
+        if sys.platform == 'darwin':
+            self.freezedetectAction.triggered.connect(lambda: self.configFilters(VideoFilter.FREEZEDETECT),
+                                                      Qt.QueuedConnection)
+        else:
+            self.freezedetectAction.triggered.connect(lambda: self.configFilters(VideoFilter.FREEZEDETECT),
+                                                      Qt.DirectConnection)
+        self.freezedetectAction.setEnabled(False)
+        self.analyzeAction = VCFilterMenuAction(QPixmap(':/images/blackdetect.png'), '媒体分析',#'ANALYZE'
+                                                '一次解码记录所有检测指标，',#'Records every detector metric in one decode'
+                                                '之后的检测滤镜可瞬间完成',# 'Detection filters then finish instantly'
+                                                self)
+        if sys.platform == 'darwin':
+            self.analyzeAction.triggered.connect(self.analyzeMedia, Qt.QueuedConnection)
+        else:
+            self.analyzeAction.triggered.connect(self.analyzeMedia, Qt.DirectConnection)
+        self.analyzeAction.setEnabled(False)
         menu.setIcon(self.filtersIcon)
         menu.addAction(self.blackdetectAction)
+        menu.addAction(self.scenedetectAction)
+        menu.addAction(self.silencedetectAction)
+        menu.addAction(self.freezedetectAction)
+        menu.addSeparator()
+        menu.addAction(self.analyzeAction)
         return menu
 
     def _initMenus(self) -> None:
@@ -717,7 +793,7 @@ class VideoCutter(QWidget):
         self.removeAllAction.setEnabled(False)
         if self.cliplist.count():
             self.removeAllAction.setEnabled(True)
-            if len(self.cliplist.selectedItems()):
+            if len(self.cliplist.selectedIndexes()):
                 self.removeItemAction.setEnabled(True)
 
     def itemMenu(self, pos: QPoint) -> None:
@@ -728,7 +804,7 @@ class VideoCutter(QWidget):
         self.initRemoveMenu()
         index = self.cliplist.currentRow()
         if index != -1:
-            if len(self.cliplist.selectedItems()):
+            if len(self.cliplist.selectedIndexes()):
                 self.editChapterAction.setEnabled(self.createChapters)
             if not self.inCut:
                 if index > 0:
@@ -739,33 +815,27 @@ class VideoCutter(QWidget):
 
     def editChapter(self) -> None:
         index = self.cliplist.currentRow()
-        name = self.clipTimes[index][4]
+        name = self.clipTimes[index].chapter
         name = name if name is not None else 'Chapter {}'.format(index + 1)
         dialog = VCInputDialog(self, '编辑章节名称', '章节名称:', name)#'Edit chapter name', 'Chapter name:'
         dialog.accepted.connect(lambda: self.on_editChapter(index, dialog.input.text()))
         dialog.exec_()
 
     def on_editChapter(self, index: int, text: str) -> None:
-        self.clipTimes[index][4] = text
-        self.renderClipIndex()
+        self.clipTimes[index].chapter = text
+        self.journal.edit(index, self.clipTimes[index].record())
+        self.cliplist.model().updateClip(index)
+        self.setProjectDirty()
 
     def moveItemUp(self) -> None:
         index = self.cliplist.currentRow()
-        if index != -1:
-            tmpItem = self.clipTimes[index]
-            del self.clipTimes[index]
-            self.clipTimes.insert(index - 1, tmpItem)
+        if index != -1 and self.cliplist.model().moveClip(index, index - 1):
             self.showText('剪辑向上移动')#'clip moved up'
-            self.renderClipIndex()
 
     def moveItemDown(self) -> None:
         index = self.cliplist.currentRow()
-        if index != -1:
-            tmpItem = self.clipTimes[index]
-            del self.clipTimes[index]
-            self.clipTimes.insert(index + 1, tmpItem)
+        if index != -1 and self.cliplist.model().moveClip(index, index + 1):
             self.showText('剪辑向下移动')#'clip moved down'
-            self.renderClipIndex()
 
     def removeItem(self) -> None:
         index = self.cliplist.currentRow()
@@ -775,14 +845,14 @@ class VideoCutter(QWidget):
                 self.initMediaControls()
         elif len(self.clipTimes) == 0:
             self.initMediaControls(False)
-        del self.clipTimes[index]
-        self.cliplist.takeItem(index)
+        self.cliplist.model().removeClip(index)
+        self.journal.remove(index)
         self.showText('删除剪辑')#'clip removed'
         self.renderClipIndex()
 
     def clearList(self) -> None:
-        self.clipTimes.clear()
-        self.cliplist.clear()
+        self.cliplist.model().clearClips()
+        self.journal.clear()
         self.showText('清除所有剪辑')#'all clips cleared'
         if self.mediaAvailable:
             self.inCut = False
@@ -854,7 +924,7 @@ class VideoCutter(QWidget):
                                      '无法读取项目文件 {0}:\n\n{1}'.format(project_file, file.errorString()))# 'Cannot read project file {0}:\n\n{1}'
                 return
             qApp.setOverrideCursor(Qt.WaitCursor)
-            self.clipTimes.clear()
+            self.cliplist.model().clearClips()
             linenum = 1
             while not file.atEnd():
                 # noinspection PyUnresolvedReferences
@@ -871,22 +941,24 @@ class VideoCutter(QWidget):
                         # 'Could not make sense of the selected project file. Try viewing it in a ' 'text editor to ensure it is valid and not corrupted.'
                         return
                     if project_type == 'vcp' and linenum == 1:
-                        self.loadMedia(line)
-                        time.sleep(1)
+                        bundle = None
+                        if self.projectCache and os.path.isfile(line):
+                            bundle = ProjectBundle(project_file).load(VideoService.fileIdentity(line),
+                                                                      VideoService.thumbcache,
+                                                                      VideoService.trickplayPath(line))
+                        self.loadMedia(line, bundle)
                     else:
                         mo = self.project_files[project_type].match(line)
                         if mo:
                             start, stop, _, chapter = mo.groups()
-                            clip_start = self.delta2QTime(float(start))
-                            clip_end = self.delta2QTime(float(stop))
-                            clip_image = self.captureImage(self.currentMedia, clip_start)
                             if project_type == 'vcp' and self.createChapters and len(chapter):
                                 chapter = chapter[1:len(chapter) - 1]
                                 if not len(chapter):
                                     chapter = None
                             else:
                                 chapter = None
-                            self.clipTimes.append([clip_start, clip_end, clip_image, '', chapter])
+                            self.clipTimes.append(self.newClip(Clip.usecs(float(start)), Clip.usecs(float(stop)),
+                                                               chapter))
                         else:
                             qApp.restoreOverrideCursor()
                             QMessageBox.critical(self.parent, '无效的项目文件',# 'Invalid project file'
@@ -897,16 +969,26 @@ class VideoCutter(QWidget):
             self.toolbar_end.setDisabled(True)
             self.seekSlider.setRestrictValue(0, False)
             self.blackdetectAction.setEnabled(True)
+            self.scenedetectAction.setEnabled(True)
+            self.silencedetectAction.setEnabled(True)
+            self.freezedetectAction.setEnabled(True)
+            self.analyzeAction.setEnabled(AnalysisStore.available())
             self.inCut = False
             self.newproject = True
-            QTimer.singleShot(2000, self.selectClip)
             qApp.restoreOverrideCursor()
             if project_file != os.path.join(QDir.tempPath(), self.parent.TEMP_PROJECT_FILE):
                 self.showText('项目加载')#'project loaded'
  
 
+            self.journal.reset(self.currentMedia, [clip.record() for clip in self.clipTimes])
             #xn: render clip list right now
+            self.cliplist.model().refresh()
             self.renderClipIndex()
+            # mpv loads files asynchronously, a seek issued before it reports the duration would be dropped
+            if self.mediaLoading:
+                self.selectPending = True
+            else:
+                self.selectClip()
             #self.seekSlider.setFocus()
 
     def saveProject(self, reboot: bool = False) -> None:
@@ -965,41 +1047,38 @@ class VideoCutter(QWidget):
             if ptype == 'VidCutter Project (*.vcp)':
                 # noinspection PyUnresolvedReferences
                 QTextStream(file) << '{}\n'.format(self.currentMedia)
-            for clip in self.clipTimes:
-                start_time = timedelta(hours=clip[0].hour(), minutes=clip[0].minute(), seconds=clip[0].second(),
-                                       milliseconds=clip[0].msec())
-                stop_time = timedelta(hours=clip[1].hour(), minutes=clip[1].minute(), seconds=clip[1].second(),
-                                      milliseconds=clip[1].msec())
+            for clip, start_time, stop_time in zip(self.clipTimes, *Clip.seconds(self.clipTimes)):
                 if ptype == 'VidCutter Project (*.vcp)':
                     if self.createChapters:
-                        chapter = '"{}"'.format(clip[4]) if clip[4] is not None else '""'
+                        chapter = '"{}"'.format(clip.chapter) if clip.chapter is not None else '""'
                     else:
                         #xn: chapter = ''
                         chapter = '""'
                     # noinspection PyUnresolvedReferences
-                    QTextStream(file) << '{0}\t{1}\t{2}\t{3}\n'.format(self.delta2String(start_time),
-                                                                       self.delta2String(stop_time), 0, chapter)
+                    QTextStream(file) << '{0}\t{1}\t{2}\t{3}\n'.format(start_time, stop_time, 0, chapter)
                 else:
                     
                     # noinspection PyUnresolvedReferences
 
                     #xn:don't know why save 3 paramater not 4? QTextStream(file) << '{0}\t{1}\t{2}\n'.format(self.delta2String(start_time),
                     #                                              self.delta2String(stop_time), 0)
-                    QTextStream(file) << '{0}\t{1}\t{2}\t{3}\n'.format(self.delta2String(start_time),
-                                                                       self.delta2String(stop_time), 0, chapter)
+                    QTextStream(file) << '{0}\t{1}\t{2}\t{3}\n'.format(start_time, stop_time, 0, chapter)
+            if ptype == 'VidCutter Project (*.vcp)' and self.projectCache and not reboot:
+                ProjectBundle(project_save).save(VideoService.fileIdentity(self.currentMedia), self.videoService.media,
+                                                 self.videoService.keyframes, VideoService.thumbcache,
+                                                 VideoService.trickplayPath(self.currentMedia))
             qApp.restoreOverrideCursor()
             self.projectSaved = True
             if not reboot:
                 self.showText('保存项目文件')#'project file saved'
 
-    def loadMedia(self, filename: str) -> None:
+    def loadMedia(self, filename: str, bundle: Munch = None) -> None:
         if not os.path.isfile(filename):
             return
         self.currentMedia = filename
         self.initMediaControls(True)
         self.projectDirty, self.projectSaved = False, False
-        self.cliplist.clear()
-        self.clipTimes.clear()
+        self.cliplist.model().clearClips()
         self.totalRuntime = 0
         self.setRunningTime(self.delta2QTime(self.totalRuntime).toString(self.runtimeformat))
         self.seekSlider.clearRegions()
@@ -1013,8 +1092,16 @@ class VideoCutter(QWidget):
             
             self.mediaAvailable = True
         try:
-            self.videoService.setMedia(self.currentMedia)
+            self.videoService.setMedia(self.currentMedia, bundle.probe if bundle is not None else None)
+            self.journal.reset(self.currentMedia, [])
+            if bundle is not None and len(bundle.keyframes):
+                self.videoService.setKeyframes(self.currentMedia, bundle.keyframes)
+            self.seekSlider.setTrickplay('')
+            self.trickplayPending = self.hoverPreviews
+            if not self.thumbnailsButton.isChecked() or os.path.isfile(VideoService.trickplayPath(self.currentMedia)):
+                self.buildTrickplay()
             self.seekSlider.setFocus()
+            self.mediaLoading = True
             self.mpvWidget.play(self.currentMedia)
         except InvalidMediaException:
             qApp.restoreOverrideCursor()
@@ -1064,8 +1151,11 @@ class VideoCutter(QWidget):
         self.mediainfoButton.setEnabled(flag)
         self.fullscreenButton.setEnabled(flag)
         self.fullscreenAction.setEnabled(flag)
-        self.seekSlider.clearRegions()
         self.blackdetectAction.setEnabled(flag)
+        self.scenedetectAction.setEnabled(flag)
+        self.silencedetectAction.setEnabled(flag)
+        self.freezedetectAction.setEnabled(flag)
+        self.analyzeAction.setEnabled(flag and AnalysisStore.available())
         if flag:
             self.seekSlider.setRestrictValue(0)
         else:
@@ -1076,20 +1166,50 @@ class VideoCutter(QWidget):
         self.openProjectAction.setEnabled(flag)
         self.saveProjectAction.setEnabled(False)
 
+    @pyqtSlot()
+    def buildTrickplay(self) -> None:
+        # the hover preview sheet costs a full pass over the media, so unless it is cached already it waits for the
+        # timeline thumbnails to finish instead of competing with them
+        if self.trickplayPending and self.mediaAvailable:
+            self.trickplayPending = False
+            self.videoService.buildTrickplay()
+
     @pyqtSlot(int)
     def setPosition(self, position: int) -> None:
+        self.scrubKeyframe = None
         if position >= self.seekSlider.restrictValue:
             self.mpvWidget.seek(position / 1000)
 
+    @pyqtSlot(int)
+    def scrubPosition(self, position: int) -> None:
+        # while the handle is dragged only the nearest keyframe is seeked to, so each seek decodes a single frame
+        # whatever the GOP length. positions snapping to the keyframe already shown are not seeked again. until the
+        # keyframe index is scanned mpv picks the keyframe itself
+        if position < self.seekSlider.restrictValue:
+            return
+        self.videoService.scanKeyframes()
+        keyframe = VideoService.snapKeyframe(self.videoService.keyframes, position / 1000)
+        if keyframe != self.scrubKeyframe:
+            self.scrubKeyframe = keyframe
+            self.mpvWidget.seek(keyframe, 'absolute+keyframes')
+
+    @pyqtSlot()
+    def endScrub(self) -> None:
+        if self.scrubKeyframe is not None:
+            self.setPosition(self.seekSlider.value())
+
     @pyqtSlot(float, int)
     def on_positionChanged(self, progress: float, frame: int) -> None:
         progress *= 1000
         if self.seekSlider.restrictValue < progress or progress == 0:
-            self.seekSlider.setValue(int(progress))
+            # the handle stays under the cursor while scrubbing rather than jumping back to the keyframe shown
+            if not self.seekSlider.isSliderDown():
+                self.seekSlider.ensureVisible(int(progress))
+                self.seekSlider.setValue(int(progress))
             self.timeCounter.setTime(self.delta2QTime(round(progress)).toString(self.timeformat))
             self.frameCounter.setFrame(frame)
-            if self.seekSlider.maximum() > 0:
-                self.taskbar.setProgress(float(progress / self.seekSlider.maximum()), True)
+            if self.seekSlider.mediaMaximum() > 0:
+                self.taskbar.setProgress(float(progress / self.seekSlider.mediaMaximum()), True)
 
     @pyqtSlot(float, int)
     def on_durationChanged(self, duration: float, frames: int) -> None:
@@ -1097,18 +1217,22 @@ class VideoCutter(QWidget):
         self.seekSlider.setRange(0, int(duration))
         self.timeCounter.setDuration(self.delta2QTime(round(duration)).toString(self.timeformat))
         self.frameCounter.setFrameCount(frames)
+        self.mediaLoading = False
+        if self.selectPending:
+            self.selectPending = False
+            self.selectClip()
 
     @pyqtSlot()
-    @pyqtSlot(QListWidgetItem)
-    def selectClip(self, item: QListWidgetItem = None) -> None:
+    @pyqtSlot(QModelIndex)
+    def selectClip(self, index: QModelIndex = None) -> None:
         # noinspection PyBroadException
         try:
-            row = self.cliplist.row(item) if item is not None else 0
-            if item is None:
-                self.cliplist.item(row).setSelected(True)
-            if not len(self.clipTimes[row][3]):
+            row = index.row() if index is not None else 0
+            if index is None:
+                self.cliplist.selectionModel().select(self.cliplist.model().index(row), QItemSelectionModel.Select)
+            if not self.clipTimes[row].external:
                 self.seekSlider.selectRegion(row)
-                self.setPosition(self.clipTimes[row][0].msecsSinceStartOfDay())
+                self.setPosition(self.clipTimes[row].start // 1000)
         except Exception:
             self.doPass()
 
@@ -1169,7 +1293,7 @@ class VideoCutter(QWidget):
         if checked:
             exist = False
             for clip in self.clipTimes:
-                if clip[4] is not None:
+                if clip.chapter is not None:
                     exist = True
                     break
             if exist:
@@ -1177,8 +1301,10 @@ class VideoCutter(QWidget):
                                             '要还原之前设置的章节名称吗？ ',#'Would you like to restore previously set chapter names?'
                                             buttons=QMessageBox.Yes | QMessageBox.No, parent=self)
                 if chapterswarn.exec_() == QMessageBox.No:
-                    for clip in self.clipTimes:
-                        clip[4] = None
+                    for index, clip in enumerate(self.clipTimes):
+                        clip.chapter = None
+                        self.journal.edit(index, clip.record())
+        self.cliplist.model().refresh()
         self.renderClipIndex()
 
     @pyqtSlot(bool)
@@ -1191,10 +1317,10 @@ class VideoCutter(QWidget):
     @pyqtSlot(list)
     def addScenes(self, scenes: List[list]) -> None:
         if len(scenes):
-            [
-                self.clipTimes.append([scene[0], scene[1], self.captureImage(self.currentMedia, scene[0]), '', None])
-                for scene in scenes if len(scene)
-            ]
+            clips = [self.newClip(Clip.usecs(scene[0]), Clip.usecs(scene[1])) for scene in scenes if len(scene)]
+            self.cliplist.model().appendClips(clips)
+            [self.journal.add(len(self.clipTimes) - len(clips) + index, clip.record())
+             for index, clip in enumerate(clips)]
             self.renderClipIndex()
         self.filterProgressBar.done(VCProgressDialog.Accepted)
 
@@ -1213,6 +1339,57 @@ class VideoCutter(QWidget):
                                           partial(self.videoService.blackdetect, d.value), d))
             d.setFixedSize(435, d.sizeHint().height())
             d.exec_()
+        elif name == VideoFilter.SCENEDETECT:
+            desc = '<p>Detect hard cuts between scenes by scoring how much each frame differs from the one before ' \
+                   'it. Lower the threshold to catch softer scene changes, raise it to ignore camera motion. ' \
+                   'Scores are kept so running the filter again with another threshold is instant.</p>' \
+                   '<p><b>WARNING:</b> 根据源媒体的长度和质量，这可能需要很长时间才能完成。</p> '
+            d = VCDoubleInputDialog(self, 'SCENEDETECT - Filter settings', 'Scene change threshold:',
+                                    self.filter_settings.scenedetect.default_threshold,
+                                    self.filter_settings.scenedetect.min_threshold,
+                                    self.filter_settings.scenedetect.max_threshold, 2, 0.05, desc)
+            d.buttons.accepted.connect(
+                lambda: self.startFilters('检测场景(按ESC取消) ',
+                                          partial(self.videoService.scenedetect, d.value), d))
+            d.setFixedSize(435, d.sizeHint().height())
+            d.exec_()
+        elif name == VideoFilter.SILENCEDETECT:
+            desc = '<p>Detect audio intervals that are (almost) completely silent. Useful for splitting lecture or ' \
+                   'meeting recordings at natural pauses. Only the audio stream is decoded so this is much faster ' \
+                   'than detecting black frames. You can set the minimum duration of a detected silence above to ' \
+                   'adjust the sensitivity.</p>'
+            d = VCDoubleInputDialog(self, 'SILENCEDETECT - Filter settings', 'Minimum duration for silences:',
+                                    self.filter_settings.silencedetect.default_duration,
+                                    self.filter_settings.silencedetect.min_duration, 999.9, 1, 0.1, desc, 'secs')
+            d.buttons.accepted.connect(
+                lambda: self.startFilters('检测静音(按ESC取消) ',
+                                          partial(self.videoService.silencedetect, d.value), d))
+            d.setFixedSize(435, d.sizeHint().height())
+            d.exec_()
+        elif name == VideoFilter.FREEZEDETECT:
+            desc = '<p>Detect intervals where the picture does not change, such as a dead or idle surveillance ' \
+                   'camera. The frozen intervals are dropped and the moving footage between them becomes your ' \
+                   'clips. Only keyframes are decoded so even multi-day recordings finish in minutes. You can set ' \
+                   'the minimum duration of a frozen interval above to adjust the sensitivity.</p>'
+            d = VCDoubleInputDialog(self, 'FREEZEDETECT - Filter settings', 'Minimum duration for frozen frames:',
+                                    self.filter_settings.freezedetect.default_duration,
+                                    self.filter_settings.freezedetect.min_duration, 99999.9, 1, 1.0, desc, 'secs')
+            d.buttons.accepted.connect(
+                lambda: self.startFilters('检测静止画面(按ESC取消) ',
+                                          partial(self.videoService.freezedetect, d.value), d))
+            d.setFixedSize(435, d.sizeHint().height())
+            d.exec_()
+
+    @pyqtSlot()
+    def analyzeMedia(self) -> None:
+        self.parent.lock_gui(True)
+        self.filterProgress('分析媒体(按ESC取消) ')#'Analyzing media (press ESC to cancel)'
+        self.videoService.analyze()
+
+    @pyqtSlot(bool)
+    def on_analyzed(self, success: bool) -> None:
+        self.filterProgressBar.done(VCProgressDialog.Accepted)
+        self.showText('媒体分析{}'.format('完成' if success else '失败'))#'Media analysis complete/failed'
 
     @pyqtSlot(str, partial, QDialog)
     def startFilters(self, progress_text: str, filter_func: partial, config_dialog: QDialog) -> None:
@@ -1249,18 +1426,18 @@ class VideoCutter(QWidget):
             for file in clips:
                 if len(self.clipTimes) > 0:
                     lastItem = self.clipTimes[len(self.clipTimes) - 1]
-                    file4Test = lastItem[3] if len(lastItem[3]) else self.currentMedia
+                    file4Test = lastItem.source if lastItem.external else self.currentMedia
                     if self.videoService.testJoin(file4Test, file):
-                        self.clipTimes.append([QTime(0, 0), self.videoService.duration(file),
-                                               self.captureImage(file, QTime(0, 0, second=2), True), file])
+                        self.cliplist.model().appendClips([self.externalClip(file)])
+                        self.journal.add(len(self.clipTimes) - 1, self.clipTimes[-1].record())
                         filesadded = True
                     else:
                         cliperrors.append((file,
                                            (self.videoService.lastError if len(self.videoService.lastError) else '')))
                         self.videoService.lastError = ''
                 else:
-                    self.clipTimes.append([QTime(0, 0), self.videoService.duration(file),
-                                           self.captureImage(file, QTime(0, 0, second=2), True), file])
+                    self.cliplist.model().appendClips([self.externalClip(file)])
+                    self.journal.add(len(self.clipTimes) - 1, self.clipTimes[-1].record())
                     filesadded = True
             if len(cliperrors):
                 detailedmsg = '''<p>The file(s) listed were found to be incompatible for inclusion to the clip index as
@@ -1281,11 +1458,12 @@ class VideoCutter(QWidget):
                 self.renderClipIndex()
 
     def hasExternals(self) -> bool:
-        return True in [len(item[3]) > 0 for item in self.clipTimes]
+        return True in [clip.external for clip in self.clipTimes]
 
     def clipStart(self) -> None:
         starttime = self.delta2QTime(self.seekSlider.value())
-        self.clipTimes.append([starttime, '', self.captureImage(self.currentMedia, starttime), '', None])
+        self.cliplist.model().appendClips([self.newClip(Clip.usecs(starttime))])
+        self.journal.add(len(self.clipTimes) - 1, self.clipTimes[-1].record())
         self.timeCounter.setMinimum(starttime.toString(self.timeformat))
         self.frameCounter.lockMinimum()
         self.toolbar_start.setDisabled(True)
@@ -1293,6 +1471,10 @@ class VideoCutter(QWidget):
 ##xn:closed        self.clipindex_add.setDisabled(True)
         self.seekSlider.setRestrictValue(self.seekSlider.value(), True)
         self.blackdetectAction.setDisabled(True)
+        self.scenedetectAction.setDisabled(True)
+        self.silencedetectAction.setDisabled(True)
+        self.freezedetectAction.setDisabled(True)
+        self.analyzeAction.setDisabled(True)
         self.inCut = True
         self.showText('视频于{}开始剪辑'.format(starttime.toString(self.timeformat))) #'clip started at {}'
         self.renderClipIndex()
@@ -1301,17 +1483,23 @@ class VideoCutter(QWidget):
     def clipEnd(self) -> None:
         item = self.clipTimes[len(self.clipTimes) - 1]
         endtime = self.delta2QTime(self.seekSlider.value())
-        if endtime.__lt__(item[0]):
+        if Clip.usecs(endtime) < item.start:
             QMessageBox.critical(self.parent, '无效结束时间',#'Invalid END Time'
                                  '剪辑结束时间必须在它的开始时间之后，请再试一次 。')#'The clip end time must come AFTER it\'s start time. Please try again.'
             return
-        item[1] = endtime
+        item.end = Clip.usecs(endtime)
+        self.journal.edit(len(self.clipTimes) - 1, item.record())
+        self.cliplist.model().updateClip(len(self.clipTimes) - 1)
         self.toolbar_start.setEnabled(True)
         self.toolbar_end.setDisabled(True)
 ##xn:closed        self.clipindex_add.setEnabled(True)
         self.timeCounter.setMinimum()
         self.seekSlider.setRestrictValue(0, False)
         self.blackdetectAction.setEnabled(True)
+        self.scenedetectAction.setEnabled(True)
+        self.silencedetectAction.setEnabled(True)
+        self.freezedetectAction.setEnabled(True)
+        self.analyzeAction.setEnabled(AnalysisStore.available())
         self.inCut = False
         self.showText('视频于{}结束剪辑'.format(endtime.toString(self.timeformat)))#'clip ends at {}'
         self.renderClipIndex()
@@ -1327,25 +1515,57 @@ class VideoCutter(QWidget):
     # noinspection PyUnusedLocal,PyUnusedLocal,PyUnusedLocal
     @pyqtSlot(QModelIndex, int, int, QModelIndex, int)
     def syncClipList(self, parent: QModelIndex, start: int, end: int, destination: QModelIndex, row: int) -> None:
-        index = row - 1 if start < row else row
-        clip = self.clipTimes.pop(start)
-        self.clipTimes.insert(index, clip)
-        if not len(clip[3]):
-            self.seekSlider.switchRegions(start, index)
-        self.showText('更新剪辑顺序')#'clip order updated'
+        # the model has already moved the clip, this keeps the journal in step. timeline regions are ordered by time
+        # so a move does not touch them
+        self.journal.move(start, row - 1 if start < row else row)
         self.renderClipIndex()
 
     def renderClipIndex(self) -> None:
-        self.seekSlider.clearRegions()
-        self.totalRuntime = 0
-        externals = self.cliplist.renderClips(self.clipTimes)
+        self.totalRuntime = Clip.runtime(self.clipTimes) // 1000
+        externals = len([clip for clip in self.clipTimes if clip.external])
         if len(self.clipTimes) and not self.inCut and externals != 1:
             self.toolbar_save.setEnabled(True)
             self.saveProjectAction.setEnabled(True)
-        if self.inCut or len(self.clipTimes) == 0 or not isinstance(self.clipTimes[0][1], QTime):
+        if self.inCut or len(self.clipTimes) == 0 or not self.clipTimes[0].complete:
             self.toolbar_save.setEnabled(False)
             self.saveProjectAction.setEnabled(False)
         self.setRunningTime(self.delta2QTime(self.totalRuntime).toString(self.runtimeformat))
+        self.journal.compact(lambda: (self.currentMedia, [clip.record() for clip in self.clipTimes]))
+
+    def newClip(self, start: int, end: int = None, chapter: str = None) -> Clip:
+        return Clip(start, end, '', chapter, self.clipThumbKey(self.currentMedia, start / 1000000))
+
+    def externalClip(self, file: str) -> Clip:
+        return Clip(0, Clip.usecs(self.videoService.duration(file)), file, None, self.captureClipThumb(file, 2.0))
+
+    def recoverJournal(self) -> bool:
+        state = self.journal.replay()
+        if state is None or not len(state.clips) or state.media is None or not os.path.isfile(state.media):
+            self.journal.discard()
+            return False
+        recoverwarn = VCMessageBox('恢复剪辑', '发现未保存的剪辑',#'Recover clips', 'Unsaved clips found'
+                                   '上次运行没有正常退出，要恢复之前未保存的 {} 个剪辑吗？'.format(len(state.clips)),
+                                   #'The last session did not exit cleanly, would you like to recover {} unsaved clips?'
+                                   buttons=QMessageBox.Yes | QMessageBox.No, parent=self)
+        if recoverwarn.exec_() == QMessageBox.No:
+            self.journal.discard()
+            return False
+        self.loadMedia(state.media)
+        clips = []
+        for start, end, external, chapter in state.clips:
+            # a clip still waiting for its end point cannot be restored into a consistent cut state
+            if end is None:
+                continue
+            if len(external):
+                clips.append(Clip(start, end, external, None, self.captureClipThumb(external, 2.0)))
+            else:
+                clips.append(self.newClip(start, end, chapter))
+        self.cliplist.model().appendClips(clips)
+        self.journal.reset(self.currentMedia, [clip.record() for clip in self.clipTimes])
+        self.projectDirty = True
+        self.renderClipIndex()
+        self.showText('恢复剪辑')#'clips recovered'
+        return True
 
     @staticmethod
     def delta2QTime(msecs: Union[float, int]) -> QTime:
@@ -1366,13 +1586,46 @@ class VideoCutter(QWidget):
         else:
             return '%f' % (td.days * 86400 + td.seconds + td.microseconds / 1000000.)
 
-    def captureImage(self, source: str, frametime: QTime, external: bool = False) -> QPixmap:
-        return VideoService.captureFrame(self.settings, source, frametime.toString(self.timeformat), external=external)
+    def clipThumbRate(self, source: str) -> float:
+        return self.videoService.framerate() if source == self.currentMedia else 1000.0
+
+    def clipThumbKey(self, source: str, frametime: float) -> str:
+        return VideoService.thumbcache.key(VideoService.fileIdentity(source), frametime,
+                                           VideoService.config.thumbnails['INDEX'], self.clipThumbRate(source))
+
+    def captureClipThumb(self, source: str, frametime: float) -> str:
+        # external clips show the placeholder until the clip thumbnail worker has captured their frame
+        key = self.clipThumbKey(source, frametime)
+        if VideoService.thumbcache.get(key) is None:
+            self.clipThumbsWorker.enqueue(Munch(ffmpeg=self.videoService.backends.ffmpeg, project=self.currentMedia,
+                                                media=source, times=[frametime],
+                                                size=VideoService.config.thumbnails['INDEX'],
+                                                framerate=self.clipThumbRate(source), thumbnailer=None))
+        return key
+
+    @pyqtSlot()
+    def captureClipImages(self) -> None:
+        # clips enter the index with a shared placeholder and the thumbnails of the rows the index has painted are
+        # queued in one batch to the clip thumbnail worker
+        frametimes = self.cliplist.model().takePending()
+        if not len(frametimes) or self.currentMedia is None:
+            return
+        self.clipThumbsWorker.enqueue(Munch(ffmpeg=self.videoService.backends.ffmpeg, project=self.currentMedia,
+                                            media=self.currentMedia, times=frametimes, size=VideoService.config.thumbnails['INDEX'],
+                                            framerate=self.videoService.framerate(),
+                                            thumbnailer=self.thumbnailer if self.mpvThumbs else None))
+
+    @pyqtSlot(str, float)
+    def setClipImage(self, media: str, frametime: float) -> None:
+        if media == self.currentMedia:
+            self.cliplist.model().updateThumb(Clip.usecs(frametime))
+        else:
+            self.cliplist.model().updateExternalThumb(media)
 
     def saveMedia(self) -> None:
         clips = len(self.clipTimes)
         source_file, source_ext = os.path.splitext(self.currentMedia if self.currentMedia is not None
-                                                   else self.clipTimes[0][3])
+                                                   else self.clipTimes[0].source)
         suggestedFilename = '{0}_EDIT{1}'.format(source_file, source_ext)
         filefilter = '视频文件 (*{0})'.format(source_ext)#'Video files (*{0})'
         if clips > 0:
@@ -1408,10 +1661,10 @@ class VideoCutter(QWidget):
             filename, filelist = '', []
             for index, clip in enumerate(self.clipTimes):
                 self.seekSlider.updateProgress(index)
-                if len(clip[3]):
-                    filelist.append(clip[3])
+                if clip.external:
+                    filelist.append(clip.source)
                 else:
-                    duration = self.delta2QTime(clip[0].msecsTo(clip[1])).toString(self.timeformat)
+                    duration = self.delta2QTime((clip.end - clip.start) // 1000).toString(self.timeformat)
                     #xn: ffmpeg cut HKVision file failed! change output file extname to .avi is working
                     filename = '{0}_{1}{2}'.format(file, '{0:0>2}'.format(index), source_ext)
                     #filename = '{0}_{1}{2}'.format(file, '{0:0>2}'.format(index), '.avi')
@@ -1421,7 +1674,7 @@ class VideoCutter(QWidget):
                     filelist.append(filename)
                     if not self.videoService.cut(source='{0}{1}'.format(source_file, source_ext),
                                                  output=filename,
-                                                 frametime=clip[0].toString(self.timeformat),
+                                                 frametime=clip.startTime.toString(self.timeformat),
                                                  duration=duration,
                                                  allstreams=True):
                         self.completeOnError('<p>Failed to cut media file, assuming media is invalid or corrupt. '
@@ -1437,8 +1690,8 @@ class VideoCutter(QWidget):
     def smartcutter(self, file: str, source_file: str, source_ext: str) -> None:
         self.smartcut_monitor = Munch(clips=[], results=[], externals=0)
         for index, clip in enumerate(self.clipTimes):
-            if len(clip[3]):
-                self.smartcut_monitor.clips.append(clip[3])
+            if clip.external:
+                self.smartcut_monitor.clips.append(clip.source)
                 self.smartcut_monitor.externals += 1
                 if index == len(self.clipTimes):
                     self.smartmonitor()
@@ -1451,8 +1704,8 @@ class VideoCutter(QWidget):
                 self.videoService.smartcut(index=index,
                                            source='{0}{1}'.format(source_file, source_ext),
                                            output=filename,
-                                           start=VideoCutter.qtime2delta(clip[0]),
-                                           end=VideoCutter.qtime2delta(clip[1]),
+                                           start=clip.start / 1000000,
+                                           end=clip.end / 1000000,
                                            allstreams=True)
 
     @pyqtSlot(bool, str)
@@ -1473,7 +1726,7 @@ class VideoCutter(QWidget):
             if self.createChapters:
                 chapters = []
                 [
-                    chapters.append(clip[4] if clip[4] is not None else 'Chapter {}'.format(index + 1))
+                    chapters.append(clip.chapter if clip.chapter is not None else 'Chapter {}'.format(index + 1))
                     for index, clip in enumerate(self.clipTimes)
                 ]
             if self.videoService.isMPEGcodec(filelist[0]):
@@ -1488,7 +1741,7 @@ class VideoCutter(QWidget):
             if not self.keepClips:
                 for f in filelist:
                     clip = self.clipTimes[filelist.index(f)]
-                    if not len(clip[3]) and os.path.isfile(f):
+                    if not clip.external and os.path.isfile(f):
                         QFile.remove(f)
             self.complete(False)
         else:
@@ -1794,11 +2047,11 @@ class VideoCutter(QWidget):
                 return
 
             if event.key() == Qt.Key_Home:
-                self.setPosition(self.seekSlider.minimum())
+                self.setPosition(self.seekSlider.mediaMinimum())
                 return
 
             if event.key() == Qt.Key_End:
-                self.setPosition(self.seekSlider.maximum())
+                self.setPosition(self.seekSlider.mediaMaximum())
                 return
 
             if event.key() == Qt.Key_Left:
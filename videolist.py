@@ -25,20 +25,225 @@
 import os
 import sys
 
-from PyQt5.QtCore import pyqtSlot, Qt, QEvent, QModelIndex, QRect, QSize, QTime
-from PyQt5.QtGui import QColor, QFont, QIcon, QKeyEvent, QMouseEvent, QPainter, QPalette, QPen, QResizeEvent
-from PyQt5.QtWidgets import (qApp, QAbstractItemView, QListWidget, QListWidgetItem, QProgressBar, QSizePolicy, QStyle,
-                             QStyledItemDelegate, QStyleFactory, QStyleOptionViewItem)
+from PyQt5.QtCore import (pyqtSignal, pyqtSlot, QAbstractListModel, QByteArray, QEvent, QItemSelectionModel, QMimeData,
+                          QModelIndex, QObject, QRect, QSize, Qt, QTimer)
+from PyQt5.QtGui import (QColor, QDropEvent, QFont, QIcon, QImage, QKeyEvent, QMouseEvent, QPainter, QPalette, QPen,
+                         QPixmap, QPixmapCache, QResizeEvent)
+from PyQt5.QtWidgets import (qApp, QAbstractItemView, QListView, QProgressBar, QSizePolicy, QStyle, QStyledItemDelegate,
+                             QStyleFactory, QStyleOptionViewItem)
 
 from vidcutter.libs.graphicseffects import OpacityEffect
+from vidcutter.libs.munch import Munch
+from vidcutter.libs.videoservice import VideoService
 
 
-class VideoList(QListWidget):
+class ClipModel(QAbstractListModel):
+    """List model over the clip index of the cutter.
+
+    Edits go through the model so views get row level insert, remove, move and change notifications instead of a
+    full rebuild. Thumbnails are resolved from their cache key when a view asks for them, which only happens for
+    painted rows. Clips whose thumbnail is not cached yet show a placeholder and are handed out in one batch through
+    thumbsRequested.
+    """
+    thumbsRequested = pyqtSignal()
+    mimetype = 'application/x-vidcutter-cliprow'
+
+    def __init__(self, parent=None):
+        super(ClipModel, self).__init__(parent)
+        self.parent = parent
+        self.clips = self.parent.clipTimes
+        self._requested = set()
+        self._pending = set()
+        self._requestTimer = QTimer(self, singleShot=True, interval=0, timeout=self.thumbsRequested.emit)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.clips)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.clips):
+            return None
+        clip = self.clips[index.row()]
+        if role == Qt.DecorationRole + 1:
+            return self.thumbnail(clip)
+        elif role == Qt.DisplayRole + 1:
+            return clip.startTime.toString(self.parent.timeformat)
+        elif role == Qt.UserRole + 1:
+            return clip.endTime.toString(self.parent.timeformat) if clip.complete else ''
+        elif role == Qt.UserRole + 2:
+            return clip.source
+        elif role == Qt.UserRole + 3:
+            if not self.parent.createChapters:
+                return ''
+            #chapterName = clip[4] if clip[4] is not None else 'Chapter {}'.format(index + 1) Maohl
+            return clip.chapter if clip.chapter is not None else '截图章节 {}'.format(index.row() + 1)
+        elif role == Qt.ToolTipRole:
+            #'Drag to reorder clips' Maohl
+            return clip.source if clip.external else '上下拖动截图'
+        elif role == Qt.StatusTipRole:
+            #'Reorder clips with mouse drag & drop or right-click menu on the clip to be moved' Maohl
+            return '点击鼠标上下拖动截图 鼠标右键显示菜单'
+        elif role == Qt.TextAlignmentRole:
+            return Qt.AlignVCenter
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return Qt.ItemIsSelectable | Qt.ItemIsDragEnabled | Qt.ItemIsEnabled
+
+    def supportedDropActions(self) -> Qt.DropActions:
+        return Qt.MoveAction
+
+    def mimeTypes(self) -> list:
+        return [ClipModel.mimetype]
+
+    def mimeData(self, indexes: list) -> QMimeData:
+        mimedata = QMimeData()
+        mimedata.setData(ClipModel.mimetype, QByteArray(str(indexes[0].row()).encode()))
+        return mimedata
+
+    def thumbnail(self, clip) -> QPixmap:
+        # decoded pixmaps live in the global pixmap cache, so only thumbnails of recently painted rows stay in memory
+        key = '{0}{1}'.format(clip.thumbkey, '-external' if clip.external else '')
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            image = VideoService.thumbcache.get(clip.thumbkey)
+            if image is None:
+                if not clip.external:
+                    self.requestThumb(clip.start / 1000000)
+                return self.parent.clipPlaceholder
+            pixmap = QPixmap.fromImage(image)
+            if clip.external:
+                pixmap = VideoService.markExternal(pixmap)
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def requestThumb(self, frametime: float) -> None:
+        if frametime not in self._requested:
+            self._requested.add(frametime)
+            self._pending.add(frametime)
+            self._requestTimer.start()
+
+    def takePending(self) -> list:
+        pending = sorted(self._pending)
+        self._pending.clear()
+        return pending
+
+    def updateThumb(self, start: int) -> None:
+        self._requested.discard(start / 1000000)
+        for row, clip in enumerate(self.clips):
+            if clip.start == start and not clip.external:
+                self.updateClip(row)
+
+    def updateExternalThumb(self, source: str) -> None:
+        for row, clip in enumerate(self.clips):
+            if clip.external and clip.source == source:
+                self.updateClip(row)
+
+    def appendClips(self, clips: list) -> None:
+        if len(clips):
+            self.beginInsertRows(QModelIndex(), len(self.clips), len(self.clips) + len(clips) - 1)
+            self.clips.extend(clips)
+            self.endInsertRows()
+
+    def updateClip(self, row: int) -> None:
+        self.dataChanged.emit(self.index(row), self.index(row))
+
+    def removeClip(self, row: int) -> None:
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.clips[row]
+        self.endRemoveRows()
+        # default chapter names follow the row number
+        if row < len(self.clips):
+            self.dataChanged.emit(self.index(row), self.index(len(self.clips) - 1))
+
+    def moveRows(self, parent: QModelIndex, start: int, count: int, destination: QModelIndex, row: int) -> bool:
+        if count != 1 or not 0 <= start < self.rowCount() or not 0 <= row <= self.rowCount() \
+                or not self.beginMoveRows(parent, start, start, destination, row):
+            return False
+        index = row - 1 if start < row else row
+        self.clips.insert(index, self.clips.pop(start))
+        self.endMoveRows()
+        self.dataChanged.emit(self.index(min(start, index)), self.index(max(start, index)))
+        return True
+
+    def moveClip(self, start: int, index: int) -> bool:
+        return self.moveRows(QModelIndex(), start, 1, QModelIndex(), index + 1 if index > start else index)
+
+    def clearClips(self) -> None:
+        self.beginResetModel()
+        self.clips.clear()
+        self._requested.clear()
+        self._pending.clear()
+        self.endResetModel()
+
+    def refresh(self) -> None:
+        self.beginResetModel()
+        self.endResetModel()
+
+
+class ClipThumbWorker(QObject):
+    """Produces clip index thumbnails on one long lived background thread.
+
+    Jobs queue up in the thread's event loop and run in order. Cached frames are announced first, the rest are
+    captured through the mpv thumbnailer or in batched ffmpeg runs. Frames of external clips always go through
+    ffmpeg so the shared mpv instance stays on the loaded media. Jobs queued for media that is no longer loaded are
+    skipped.
+    """
+    queued = pyqtSignal('PyQt_PyObject')
+    imageReady = pyqtSignal(str, float)
+    batchsize = 32
+
+    def __init__(self):
+        super(ClipThumbWorker, self).__init__()
+        self.media = None
+        self.stopped = False
+        self.queued.connect(self.generate)
+
+    def enqueue(self, job: Munch) -> None:
+        self.media = job.project
+        self.queued.emit(job)
+
+    @pyqtSlot('PyQt_PyObject')
+    def generate(self, job: Munch) -> None:
+        if self.stopped or job.project != self.media:
+            return
+        identity = VideoService.fileIdentity(job.media)
+        keys = [VideoService.thumbcache.key(identity, frametime, job.size, job.framerate) for frametime in job.times]
+        missing = []
+        for index, key in enumerate(keys):
+            if VideoService.thumbcache.get(key) is None:
+                missing.append(index)
+            else:
+                self.imageReady.emit(job.media, job.times[index])
+        if job.thumbnailer is not None:
+            for index in missing:
+                if self.stopped:
+                    return
+                frame = job.thumbnailer.capture(job.media, job.times[index], job.size)
+                if frame is not None:
+                    self.ready(job, keys[index], job.times[index], frame)
+        else:
+            for pos in range(0, len(missing), ClipThumbWorker.batchsize):
+                if self.stopped:
+                    return
+                batch = missing[pos:pos + ClipThumbWorker.batchsize]
+                VideoService.captureFrames(job.ffmpeg, job.media, [job.times[index] for index in batch], job.size,
+                                           lambda num, frame: self.ready(job, keys[batch[num]], job.times[batch[num]],
+                                                                         frame), framerate=job.framerate)
+
+    def ready(self, job: Munch, key: str, frametime: float, frame: QImage) -> None:
+        VideoService.thumbcache.put(key, frame)
+        self.imageReady.emit(job.media, frametime)
+
+
+class VideoList(QListView):
     def __init__(self, parent=None):
         super(VideoList, self).__init__(parent)
         self.parent = parent
         self.theme = self.parent.theme
         self._progressbars = []
+        self.setModel(ClipModel(self.parent))
         self.setMouseTracking(True)
         self.setDropIndicatorShown(True)
         self.setFixedWidth(190)
@@ -47,6 +252,8 @@ class VideoList(QListWidget):
         self.setItemDelegate(VideoItem(self))
         self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Expanding)
         self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
         self.setDragEnabled(True)
         self.setDragDropMode(QAbstractItemView.InternalMove)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -59,41 +266,39 @@ class VideoList(QListWidget):
         self.opacityEffect.setEnabled(False)
         self.setGraphicsEffect(self.opacityEffect)
 
-    def renderClips(self, cliptimes: list) -> int:
-        self.clear()
-        externalCount = 0
-        for index, clip in enumerate(cliptimes):
-            chapterName, endItem = '', ''
-            if isinstance(clip[1], QTime):
-                endItem = clip[1].toString(self.parent.timeformat)
-                self.parent.totalRuntime += clip[0].msecsTo(clip[1])
-            listitem = QListWidgetItem(self)
-            #listitem.setToolTip('Drag to reorder clips') Maohl
-            listitem.setToolTip('上下拖动截图')
-            if len(clip[3]):
-                listitem.setToolTip(clip[3])
-                externalCount += 1
-            if self.parent.createChapters:
-                #chapterName = clip[4] if clip[4] is not None else 'Chapter {}'.format(index + 1) Maohl
-                chapterName = clip[4] if clip[4] is not None else '截图章节 {}'.format(index + 1)
-            #listitem.setStatusTip('Reorder clips with mouse drag & drop or right-click menu on the clip to be moved') Maohl
-            listitem.setStatusTip('点击鼠标上下拖动截图 鼠标右键显示菜单')   
-            listitem.setTextAlignment(Qt.AlignVCenter)
-            listitem.setData(Qt.DecorationRole + 1, clip[2])
-            listitem.setData(Qt.DisplayRole + 1, clip[0].toString(self.parent.timeformat))
-            listitem.setData(Qt.UserRole + 1, endItem)
-            listitem.setData(Qt.UserRole + 2, clip[3])
-            listitem.setData(Qt.UserRole + 3, chapterName)
-            listitem.setFlags(Qt.ItemIsSelectable | Qt.ItemIsDragEnabled | Qt.ItemIsEnabled)
-            self.addItem(listitem)
-            if isinstance(clip[1], QTime) and not len(clip[3]):
-                self.parent.seekSlider.addRegion(clip[0].msecsSinceStartOfDay(), clip[1].msecsSinceStartOfDay())
-        return externalCount
+    def count(self) -> int:
+        return self.model().rowCount()
+
+    def currentRow(self) -> int:
+        return self.currentIndex().row()
+
+    def selectRow(self, row: int) -> None:
+        # selects a clip picked on the timeline without the seek to its start a selection change normally triggers
+        index = self.model().index(row)
+        self.selectionModel().blockSignals(True)
+        self.selectionModel().setCurrentIndex(index, QItemSelectionModel.ClearAndSelect)
+        self.selectionModel().blockSignals(False)
+        self.scrollTo(index)
+        self.viewport().update()
+
+    def dropEvent(self, event: QDropEvent) -> None:
+        if event.source() is not self or not event.mimeData().hasFormat(ClipModel.mimetype):
+            event.ignore()
+            return
+        start = int(bytes(event.mimeData().data(ClipModel.mimetype)).decode())
+        target = self.indexAt(event.pos())
+        row = target.row() if target.isValid() else self.count()
+        if target.isValid() and self.dropIndicatorPosition() == QAbstractItemView.BelowItem:
+            row += 1
+        # the move is applied here so the drag must not report a move back to the view, which would remove rows
+        event.setDropAction(Qt.CopyAction)
+        event.accept()
+        if self.model().moveRows(QModelIndex(), start, 1, QModelIndex(), row):
+            self.parent.showText('更新剪辑顺序')#'clip order updated'
 
     def showProgress(self, steps: int) -> None:
         for row in range(self.count()):
-            item = self.item(row)
-            progress = ListProgress(steps, self.visualItemRect(item), self)
+            progress = ListProgress(steps, self.visualRect(self.model().index(row)), self)
             self._progressbars.append(progress)
 
     @pyqtSlot()
@@ -25,22 +25,22 @@
 import logging
 import math
 import sys
+from typing import Optional
 
-from PyQt5.QtCore import QEvent, QObject, QRect, QSettings, QSize, QThread, Qt, pyqtSignal, pyqtSlot
-from PyQt5.QtGui import QColor, QKeyEvent, QMouseEvent, QPaintEvent, QPalette, QPen, QWheelEvent
-from PyQt5.QtWidgets import (qApp, QHBoxLayout, QLabel, QLayout, QProgressBar, QSizePolicy, QSlider, QStyle,
-                             QStyleFactory, QStyleOptionSlider, QStylePainter, QWidget)
+from PyQt5.QtCore import QEvent, QModelIndex, QObject, QRect, QSize, QThread, QTimer, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import (QColor, QFont, QImage, QKeyEvent, QMouseEvent, QPainter, QPaintEvent, QPalette, QPen,
+                         QPixmap, QWheelEvent)
+from PyQt5.QtWidgets import (qApp, QLabel, QProgressBar, QSlider, QStyle, QStyleFactory, QStyleOptionSlider,
+                             QStylePainter)
 
+from vidcutter.libs.intervals import IntervalIndex
+from vidcutter.libs.munch import Munch
+from vidcutter.libs.thumbnails import MpvThumbnailer
 from vidcutter.libs.videoservice import VideoService
 
 
 class VideoSlider(QSlider):
-    def __init__(self, parent=None):
-        super(VideoSlider, self).__init__(parent)
-        self.parent = parent
-        self.logger = logging.getLogger(__name__)
-        self.theme = self.parent.theme
-        self._styles = '''
+    stylesheet = '''
         QSlider:horizontal {{
             margin: 16px 8px 32px;
             height: {sliderHeight}px;
@@ -66,11 +66,46 @@ class VideoSlider(QSlider):
             width: 15px;
             height: {handleHeight}px;
             margin: -12px -8px -20px;
+        }}
+        QSlider::groove:horizontal {{
+            border: {grooveBorder};
+            height: {sliderHeight}px;
+            margin: 0;
+            {timelineBackground}
         }}'''
+    variants = Munch(
+        thumbs=Munch(height=60, handleHeight=85, handle='handle', regionHeight=32, border='none', timeline=''),
+        filmstrip=Munch(height=60, handleHeight=85, handle='handle', regionHeight=32, border='1px ridge #444',
+                        timeline='background: #000 url(:images/filmstrip.png) repeat-x left;'),
+        nothumbs=Munch(height=15, handleHeight=42, handle='handle-nothumbs', regionHeight=12, border='1px ridge #444',
+                       timeline='background: #000 url(:images/filmstrip-nothumbs.png) repeat-x left;'))
+
+    def __init__(self, parent=None):
+        super(VideoSlider, self).__init__(parent)
+        self.parent = parent
+        self.logger = logging.getLogger(__name__)
+        self.theme = self.parent.theme
+        self._styles = {}
+        self._style = None
         self._progressbars = []
-        self._regions = []
+        self._filmstrip = None
+        self._thumbsGeneration = 0
+        self._mediaRange = (0, 0)
+        self._zooming = False
+        self.zoomLevel = 0
+        self.maxZoomLevel = 8
+        self._zoomTimer = QTimer(self)
+        self._zoomTimer.setSingleShot(True)
+        self._zoomTimer.setInterval(250)
+        self._zoomTimer.timeout.connect(self.reloadThumbs)
+        self._trickplay = None
+        self._previewLabel = QLabel(self, Qt.ToolTip)
+        self._previewLabel.setStyleSheet('border: 1px solid #444; background: #000;')
+        self._regions = IntervalIndex()
         self._regionHeight = 32
-        self._regionSelected = -1
+        self._regionSelected = None
+        self._regionHover = None
+        self._layers = Munch(ticks=Munch(key=None, pixmap=None), regions=Munch(key=None, pixmap=None))
         self._handleHover = False
         self._cutStarted = False
         self.showThumbs = True
@@ -93,49 +128,43 @@ class VideoSlider(QSlider):
         self.installEventFilter(self)
 
     def initStyle(self) -> None:
-        bground = 'rgba(200, 213, 236, 0.85)' if self._cutStarted else 'transparent'
-        height = 60
-        handle = 'handle-select.png' if self._handleHover else 'handle.png'
-        handleHeight = 85
-        margin = 0
-        timeline = ''
-        self._regionHeight = 32
-        if not self.thumbnailsOn:
-            if self.parent.thumbnailsButton.isChecked():
-                timeline = 'background: #000 url(:images/filmstrip.png) repeat-x left;'
-            else:
-                timeline = 'background: #000 url(:images/filmstrip-nothumbs.png) repeat-x left;'
-                handleHeight = 42
-                height = 15
-                handle = 'handle-nothumbs-select.png' if self._handleHover else 'handle-nothumbs.png'
-                self._regionHeight = 12
-            self._styles += '''
-            QSlider::groove:horizontal {{
-                border: 1px ridge #444;
-                height: {sliderHeight}px;
-                margin: 0;
-                {timelineBackground}
-            }}'''
+        # stylesheets are compiled once per state and only reapplied when the state actually changes, reparsing
+        # one is far more expensive than the lookup
+        if self.thumbnailsOn:
+            variant = 'thumbs'
+        elif self.parent.thumbnailsButton.isChecked():
+            variant = 'filmstrip'
         else:
-            self._styles += '''
-            QSlider::groove:horizontal {{
-                border: none;
-                height: {sliderHeight}px;
-                margin: 0;
-            }}'''
+            variant = 'nothumbs'
+        self._regionHeight = VideoSlider.variants[variant].regionHeight
+        margin = 0
         if self._cutStarted:
             opt = QStyleOptionSlider()
             self.initStyleOption(opt)
             control = self.style().subControlRect(QStyle.CC_Slider, opt, QStyle.SC_SliderHandle, self)
             margin = control.x()
-        self.setStyleSheet(self._styles.format(
-            sliderHeight=height,
-            subpageBgColor=bground,
-            subpageHeight=height + 2,
+        state = (variant, self._cutStarted, self._handleHover, margin)
+        if state == self._style:
+            return
+        if state not in self._styles:
+            if len(self._styles) > 16:
+                self._styles.clear()
+            self._styles[state] = VideoSlider.compileStyle(*state)
+        self._style = state
+        self.setStyleSheet(self._styles[state])
+
+    @staticmethod
+    def compileStyle(variant: str, cutStarted: bool, handleHover: bool, margin: int) -> str:
+        variant = VideoSlider.variants[variant]
+        return VideoSlider.stylesheet.format(
+            sliderHeight=variant.height,
+            subpageBgColor='rgba(200, 213, 236, 0.85)' if cutStarted else 'transparent',
+            subpageHeight=variant.height + 2,
             subpageLeftMargin=margin,
-            handleImage=handle,
-            handleHeight=handleHeight,
-            timelineBackground=timeline))
+            handleImage='{0}{1}.png'.format(variant.handle, '-select' if handleHover else ''),
+            handleHeight=variant.handleHeight,
+            grooveBorder=variant.border,
+            timelineBackground=variant.timeline)
 
     def setRestrictValue(self, value: int, force: bool = False) -> None:
         self.restrictValue = value
@@ -148,80 +177,150 @@ class VideoSlider(QSlider):
         self.initStyle()
 
     def paintEvent(self, event: QPaintEvent) -> None:
+        # ticks, timecodes and clip regions only change on resize, range change or clip edits, so they are rendered
+        # once into cached layers and playback repaints just blit them underneath the groove and handle
         painter = QStylePainter(self)
         opt = QStyleOptionSlider()
         self.initStyleOption(opt)
-        font = painter.font()
-        font.setPixelSize(11)
-        painter.setFont(font)
+        key = (self.width(), self.height(), self.devicePixelRatioF(), self.minimum(), self.maximum())
         if self.tickPosition() != QSlider.NoTicks:
-            x = 8
-            for i in range(self.minimum(), self.width(), 8):
-                if i % 5 == 0:
-                    h, w, z = 18, 1, 13
-                else:
-                    h, w, z = 8, 1, 23
-                tickcolor = QColor('#8F8F8F' if self.theme == 'dark' else '#444')
-                pen = QPen(tickcolor)
-                pen.setWidthF(w)
-                painter.setPen(pen)
-                if self.tickPosition() in (QSlider.TicksBothSides, QSlider.TicksAbove):
-                    y = self.rect().top() + z
-                    painter.drawLine(x, y, x, y + h)
-                if self.tickPosition() in (QSlider.TicksBothSides, QSlider.TicksBelow):
-                    y = self.rect().bottom() - z
-                    painter.drawLine(x, y, x, y - h)
-                    if self.parent.mediaAvailable and i % 10 == 0 and (x + 4 + 50) < self.width():
-                        painter.setPen(Qt.white if self.theme == 'dark' else Qt.black)
-                        timecode = QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), x - self.offset,
-                                                                  self.width() - (self.offset * 2))
-                        timecode = self.parent.delta2QTime(timecode).toString(self.parent.runtimeformat)
-                        painter.drawText(x + 4, y + 6, timecode)
-                if x + 30 > self.width():
-                    break
-                x += 15
+            painter.drawPixmap(0, 0, self.layer('ticks', key + (self.parent.mediaAvailable,), self.renderTicks))
+        if self.thumbnailsOn and self._filmstrip is not None:
+            painter.drawPixmap(0, self._filmstrip.top, self._filmstrip.pixmap)
         opt.subControls = QStyle.SC_SliderGroove
         painter.drawComplexControl(QStyle.CC_Slider, opt)
         if not len(self._progressbars) and (not self.parent.thumbnailsButton.isChecked() or self.thumbnailsOn):
-            for rect in self._regions:
-                rect.setY(int((self.height() - self._regionHeight) / 2) - 8)
-                rect.setHeight(self._regionHeight)
-                brushcolor = QColor(150, 190, 78, 200) if self._regions.index(rect) == self._regionSelected \
-                    else QColor(237, 242, 255, 200)
-                painter.setBrush(brushcolor)
-                painter.setPen(QColor(50, 50, 50, 170))
-                painter.drawRect(rect)
+            painter.drawPixmap(0, 0, self.layer('regions', key + (self._regionHeight,), self.renderRegions))
         opt.activeSubControls = opt.subControls = QStyle.SC_SliderHandle
         painter.drawComplexControl(QStyle.CC_Slider, opt)
 
-    def addRegion(self, start: int, end: int) -> None:
-        x = self.style().sliderPositionFromValue(self.minimum(), self.maximum(), start - self.offset,
+    def layer(self, name: str, key: tuple, render) -> QPixmap:
+        layer = self._layers[name]
+        if layer.key != key:
+            ratio = self.devicePixelRatioF()
+            layer.pixmap = QPixmap(self.size() * ratio)
+            layer.pixmap.setDevicePixelRatio(ratio)
+            layer.pixmap.fill(Qt.transparent)
+            painter = QPainter(layer.pixmap)
+            render(painter)
+            painter.end()
+            layer.key = key
+        return layer.pixmap
+
+    def invalidateLayers(self, *names) -> None:
+        for name in names or self._layers.keys():
+            self._layers[name].key = None
+        self.update()
+
+    def renderTicks(self, painter: QPainter) -> None:
+        font = QFont(self.font())
+        font.setPixelSize(11)
+        painter.setFont(font)
+        tickpen = QPen(QColor('#8F8F8F' if self.theme == 'dark' else '#444'))
+        tickpen.setWidthF(1)
+        textcolor = Qt.white if self.theme == 'dark' else Qt.black
+        # the ruler is laid out in pixels from the left edge, zooming only changes the timecodes written on it
+        x = 8
+        for i in range(0, self.width(), 8):
+            if i % 5 == 0:
+                h, z = 18, 13
+            else:
+                h, z = 8, 23
+            painter.setPen(tickpen)
+            if self.tickPosition() in (QSlider.TicksBothSides, QSlider.TicksAbove):
+                y = self.rect().top() + z
+                painter.drawLine(x, y, x, y + h)
+            if self.tickPosition() in (QSlider.TicksBothSides, QSlider.TicksBelow):
+                y = self.rect().bottom() - z
+                painter.drawLine(x, y, x, y - h)
+                if self.parent.mediaAvailable and i % 10 == 0 and (x + 4 + 50) < self.width():
+                    painter.setPen(textcolor)
+                    timecode = self.parent.delta2QTime(self.valueAt(x)).toString(self.parent.runtimeformat)
+                    painter.drawText(x + 4, y + 6, timecode)
+            if x + 30 > self.width():
+                break
+            x += 15
+
+    def renderRegions(self, painter: QPainter) -> None:
+        brushes = Munch(normal=QColor(237, 242, 255, 200), hover=QColor(227, 212, 232, 200),
+                        selected=QColor(150, 190, 78, 200))
+        painter.setPen(QColor(50, 50, 50, 170))
+        for clip in self._regions.overlapping(self.minimum(), self.maximum()):
+            if clip is self._regionSelected:
+                painter.setBrush(brushes.selected)
+            elif clip is self._regionHover:
+                painter.setBrush(brushes.hover)
+            else:
+                painter.setBrush(brushes.normal)
+            painter.drawRect(self.regionRect(clip))
+
+    def valueAt(self, x: int) -> int:
+        return QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), x - self.offset,
+                                              self.width() - (self.offset * 2))
+
+    def regionRect(self, clip) -> QRect:
+        # regions are kept in media time and only mapped to pixels when drawn, so zooming and resizing the timeline
+        # never have to rebuild them
+        x = self.style().sliderPositionFromValue(self.minimum(), self.maximum(), clip.start // 1000,
                                                  self.width() - (self.offset * 2))
-        y = int((self.height() - self._regionHeight) / 2)
-        width = self.style().sliderPositionFromValue(self.minimum(), self.maximum(), end - self.offset,
+        width = self.style().sliderPositionFromValue(self.minimum(), self.maximum(), clip.end // 1000,
                                                      self.width() - (self.offset * 2)) - x
-        height = self._regionHeight
-        self._regions.append(QRect(x + self.offset, y - 8, width, height))
-        self.update()
+        return QRect(x + self.offset, int((self.height() - self._regionHeight) / 2) - 8, width, self._regionHeight)
 
-    def switchRegions(self, index1: int, index2: int) -> None:
-        reg = self._regions.pop(index1)
-        self._regions.insert(index2, reg)
-        self.update()
+    def updateRegions(self, clips: list) -> None:
+        changed = False
+        for clip in clips:
+            if clip.complete and not clip.external:
+                changed |= self._regions.add(clip.start // 1000, clip.end // 1000, clip)
+            else:
+                changed |= self._regions.remove(clip)
+        if changed:
+            self.invalidateLayers('regions')
+
+    def removeRegions(self, clips: list) -> None:
+        [self._regions.remove(clip) for clip in clips]
+        if self._regionSelected not in self._regions:
+            self._regionSelected = None
+        if self._regionHover not in self._regions:
+            self._regionHover = None
+        self.invalidateLayers('regions')
+
+    def setRegions(self, clips: list) -> None:
+        self._regions.clear()
+        self._regionSelected, self._regionHover = None, None
+        self.updateRegions(clips)
+        self.invalidateLayers('regions')
+
+    @pyqtSlot(QModelIndex, int, int)
+    def on_clipsInserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        self.updateRegions(self.parent.clipTimes[first:last + 1])
+
+    @pyqtSlot(QModelIndex, int, int)
+    def on_clipsRemoved(self, parent: QModelIndex, first: int, last: int) -> None:
+        self.removeRegions(self.parent.clipTimes[first:last + 1])
+
+    def on_clipsChanged(self, topleft: QModelIndex, bottomright: QModelIndex, roles: list = None) -> None:
+        self.updateRegions(self.parent.clipTimes[topleft.row():bottomright.row() + 1])
+
+    @pyqtSlot()
+    def on_clipsReset(self) -> None:
+        self.setRegions(self.parent.clipTimes)
 
     def selectRegion(self, clipindex: int) -> None:
-        self._regionSelected = clipindex
-        self.update()
+        self._regionSelected = self.parent.clipTimes[clipindex] if 0 <= clipindex < len(self.parent.clipTimes) \
+            else None
+        self.invalidateLayers('regions')
 
     def clearRegions(self) -> None:
-        self._regions.clear()
-        self._regionSelected = -1
-        self.update()
+        self.setRegions([])
 
     @pyqtSlot(int)
     def showProgress(self, steps: int) -> None:
         if len(self._regions):
-            [self._progressbars.append(SliderProgress(steps, rect, self)) for rect in self._regions]
+            [
+                self._progressbars.append(SliderProgress(steps, self.regionRect(clip), self))
+                for clip in self.parent.clipTimes if clip in self._regions
+            ]
         else:
             self.parent.cliplist.showProgress(steps)
 
@@ -249,73 +348,139 @@ class VideoSlider(QSlider):
         thumbsize = QSize(
             VideoService.config.thumbnails['TIMELINE'].height() * (framesize.width() / framesize.height()),
             VideoService.config.thumbnails['TIMELINE'].height())
-        positions, frametimes = ['12'], ['12']
+        positions = []
         thumbs = int(math.ceil((self.rect().width() - (self.offset * 2)) / thumbsize.width()))
         for pos in range(thumbs):
-            val = QStyle.sliderValueFromPosition(self.minimum(), self.maximum(),
-                                                 (thumbsize.width() * pos) - self.offset,
-                                                 self.rect().width() - (self.offset * 2))
-            positions.append(val)
-        positions[0] = 1000
-        [frametimes.append(self.parent.delta2QTime(msec).toString(self.parent.timeformat)) for msec in positions]
+            positions.append(QStyle.sliderValueFromPosition(self.minimum(), self.maximum(),
+                                                            (thumbsize.width() * pos) - self.offset,
+                                                            self.rect().width() - (self.offset * 2)))
+        frametimes = VideoSlider.gridTimes(positions, self.minimum(), self.maximum(), self.mediaMaximum())
 
         class ThumbWorker(QObject):
-            completed = pyqtSignal(list)
+            thumbReady = pyqtSignal(int, int, QImage)
+            completed = pyqtSignal()
 
-            def __init__(self, settings: QSettings, media: str, times: list, size: QSize):
+            def __init__(self, generation: int, backends: Munch, media: str, times: list, size: QSize,
+                         framerate: float, keyframes: Optional[list], thumbnailer: Optional[MpvThumbnailer]):
                 super(ThumbWorker, self).__init__()
-                self.settings = settings
+                self.generation = generation
+                self.backends = backends
+                self.thumbnailer = thumbnailer
                 self.media = media
                 self.times = times
                 self.size = size
+                self.framerate = framerate
+                self.keyframes = keyframes
 
             @pyqtSlot()
             def generate(self):
-                frames = list()
-                [
-                    frames.append(VideoService.captureFrame(self.settings, self.media, frame, self.size))
-                    for frame in self.times
-                ]
-                self.completed.emit(frames)
-
+                # without a keyframe index yet the requested times are captured as is, the keyframe only seek
+                # landing on the keyframe before each of them while the index is scanned in the background
+                if self.keyframes:
+                    self.times = [VideoService.snapKeyframe(self.keyframes, frametime) for frametime in self.times]
+                # cached frames go out first, then the missing slots are captured coarse to fine so the whole
+                # filmstrip is roughly covered after the first quarter of frames arrives
+                identity = VideoService.fileIdentity(self.media)
+                keys = [VideoService.thumbcache.key(identity, frametime, self.size, self.framerate)
+                        for frametime in self.times]
+                missing = []
+                for index in VideoSlider.coarseToFine(len(self.times)):
+                    frame = VideoService.thumbcache.get(keys[index])
+                    if frame is None:
+                        missing.append(index)
+                    else:
+                        self.thumbReady.emit(self.generation, index, frame)
+                if len(missing) and self.thumbnailer is not None:
+                    for index in missing:
+                        frame = self.thumbnailer.capture(self.media, self.times[index], self.size,
+                                                         self.keyframes is not None)
+                        if frame is not None:
+                            self.ready(index, keys, frame)
+                elif len(missing):
+                    VideoService.captureFrames(self.backends.ffmpeg, self.media,
+                                               [self.times[index] for index in missing], self.size,
+                                               lambda pos, frame: self.ready(missing[pos], keys, frame),
+                                               self.keyframes is not None, self.framerate)
+                self.completed.emit()
+
+            def ready(self, index: int, keys: list, frame: QImage) -> None:
+                VideoService.thumbcache.put(keys[index], frame)
+                self.thumbReady.emit(self.generation, index, frame)
+
+        self.buildTimeline(len(frametimes), thumbsize)
         self.thumbsThread = QThread(self)
-        self.thumbsWorker = ThumbWorker(self.parent.settings, self.parent.currentMedia, frametimes, thumbsize)
+        self._thumbsGeneration += 1
+        keyframes = None
+        if self.parent.keyframeThumbs:
+            keyframes = list(self.parent.videoService.keyframes)
+            if not len(keyframes):
+                self.parent.videoService.scanKeyframes()
+        self.thumbsWorker = ThumbWorker(self._thumbsGeneration, self.parent.videoService.backends,
+                                        self.parent.currentMedia, frametimes, thumbsize,
+                                        self.parent.videoService.framerate(), keyframes,
+                                        self.parent.thumbnailer if self.parent.mpvThumbs else None)
         self.thumbsWorker.moveToThread(self.thumbsThread)
-        self.thumbsThread.started.connect(self.parent.sliderWidget.setLoader)
         self.thumbsThread.started.connect(self.thumbsWorker.generate)
         self.thumbsThread.finished.connect(self.thumbsThread.deleteLater, Qt.DirectConnection)
-        self.thumbsWorker.completed.connect(self.buildTimeline)
+        self.thumbsWorker.thumbReady.connect(self.updateThumb)
+        self.thumbsWorker.completed.connect(self.parent.buildTrickplay)
         self.thumbsWorker.completed.connect(self.thumbsWorker.deleteLater, Qt.DirectConnection)
         self.thumbsWorker.completed.connect(self.thumbsThread.quit, Qt.DirectConnection)
         self.thumbsThread.start()
 
-    @pyqtSlot(list)
-    def buildTimeline(self, thumbs: list) -> None:
-        thumbslayout = QHBoxLayout()
-        thumbslayout.setSizeConstraint(QLayout.SetFixedSize)
-        thumbslayout.setSpacing(0)
-        thumbslayout.setContentsMargins(0, 16, 0, 0)
-        for thumb in thumbs:
-            thumblabel = QLabel()
-            thumblabel.setStyleSheet('padding: 0; margin: 0;')
-            thumblabel.setFixedSize(thumb.size())
-            thumblabel.setPixmap(thumb)
-            thumbslayout.addWidget(thumblabel)
-        thumbnails = QWidget(self)
-        thumbnails.setLayout(thumbslayout)
-        filmlabel = QLabel()
-        filmlabel.setObjectName('filmstrip')
-        filmlabel.setFixedHeight(VideoService.config.thumbnails['TIMELINE'].height() + 2)
-        filmlabel.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        filmlayout = QHBoxLayout()
-        filmlayout.setContentsMargins(0, 0, 0, 16)
-        filmlayout.setSpacing(0)
-        filmlayout.addWidget(filmlabel)
-        filmstrip = QWidget(self)
-        filmstrip.setLayout(filmlayout)
+    @staticmethod
+    def gridTimes(positions: list, start: int, end: int, duration: int) -> list:
+        # slots are snapped to a power-of-two subdivision of the whole media fine enough to give each visible slot
+        # its own point. coarser levels are subsets of finer ones, so resizing, zooming or panning mostly lands on
+        # frames already cached and only the visible range of a finer level is ever generated
+        level = int(math.ceil(math.log2(max(len(positions) * max(duration, 1) / max(end - start, 1), 1))))
+        step = max(duration, 1) / (2 ** level)
+        frametimes = []
+        for val in positions:
+            val = round(val / step) * step
+            # skip the usually black first second and keep the last slot clear of the end of stream
+            frametimes.append(round(min(max(val, 1000), max(duration - 1000, 0))) / 1000)
+        return frametimes
+
+    @staticmethod
+    def coarseToFine(count: int, step: int=4) -> list:
+        order, seen = [], set()
+        while step >= 1:
+            for index in range(0, count, step):
+                if index not in seen:
+                    seen.add(index)
+                    order.append(index)
+            step //= 2
+        return order
+
+    @pyqtSlot(int, int, QImage)
+    def updateThumb(self, generation: int, index: int, thumb: QImage) -> None:
+        # thumbnails are composited straight into the filmstrip as they stream in and only their tile is repainted.
+        # frames are matched to the filmstrip by generation since the worker may be gone by the time they arrive
+        if generation != self._thumbsGeneration or self._filmstrip is None or index >= len(self._filmstrip.tiles):
+            return
+        tile = self._filmstrip.tiles[index]
+        painter = QPainter(self._filmstrip.pixmap)
+        painter.drawImage(tile, thumb)
+        painter.end()
+        self.update(tile.translated(0, self._filmstrip.top))
+
+    def buildTimeline(self, count: int, size: QSize) -> None:
+        # the filmstrip is one pixmap painted by the slider itself, a frame with a black tile per thumbnail slot
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(QSize(self.width(), size.height() + 2) * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        tiles = [QRect(index * size.width(), 1, size.width(), size.height()) for index in range(count)]
+        painter = QPainter(pixmap)
+        frame = QRect(0, 0, self.width() - 1, size.height() + 1)
+        painter.drawTiledPixmap(frame, QPixmap(':images/filmstrip-thumbs.png'))
+        painter.setPen(QColor('#444'))
+        painter.drawRect(frame)
+        [painter.fillRect(tile, Qt.black) for tile in tiles]
+        painter.end()
         self.removeThumbs()
-        self.parent.sliderWidget.addWidget(filmstrip)
-        self.parent.sliderWidget.addWidget(thumbnails)
+        self._filmstrip = Munch(pixmap=pixmap, tiles=tiles, top=15)
         self.thumbnailsOn = True
         self.initStyle()
         self.parent.sliderWidget.setLoader(False)
@@ -324,15 +489,11 @@ class VideoSlider(QSlider):
             self.parent.newproject = False
 
     def removeThumbs(self) -> None:
-        if self.parent.sliderWidget.count() == 3:
-            stripWidget = self.parent.sliderWidget.widget(1)
-            thumbWidget = self.parent.sliderWidget.widget(2)
-            self.parent.sliderWidget.removeWidget(stripWidget)
-            self.parent.sliderWidget.removeWidget(thumbWidget)
-            stripWidget.deleteLater()
-            thumbWidget.deleteLater()
+        if self._filmstrip is not None:
+            self._filmstrip = None
             self.setObjectName('nothumbs')
             self.thumbnailsOn = False
+            self.update()
 
     def errorHandler(self, error: str) -> None:
         self.logger.error(error)
@@ -350,8 +511,42 @@ class VideoSlider(QSlider):
         if value < self.restrictValue:
             self.setSliderPosition(self.restrictValue)
 
+    def mediaMinimum(self) -> int:
+        return self._mediaRange[0]
+
+    def mediaMaximum(self) -> int:
+        return self._mediaRange[1]
+
+    def zoomTimeline(self, steps: int, anchor: int) -> None:
+        level = min(max(self.zoomLevel + steps, 0), self.maxZoomLevel)
+        if level == self.zoomLevel or self.mediaMaximum() <= self.mediaMinimum():
+            return
+        span = (self.mediaMaximum() - self.mediaMinimum()) / (2 ** level)
+        start = anchor - (anchor - self.minimum()) * span / max(self.maximum() - self.minimum(), 1)
+        self.zoomLevel = level
+        self.setTimelineRange(start, span)
+
+    def panTimeline(self, delta: int) -> None:
+        if self.zoomLevel:
+            self.setTimelineRange(self.minimum() + delta, self.maximum() - self.minimum())
+
+    def ensureVisible(self, value: int) -> None:
+        if self.zoomLevel and not self.minimum() <= value <= self.maximum():
+            self.setTimelineRange(value, self.maximum() - self.minimum())
+
+    def setTimelineRange(self, start: float, span: float) -> None:
+        start = int(min(max(start, self.mediaMinimum()), self.mediaMaximum() - span))
+        self._zooming = True
+        self.setRange(start, int(start + span))
+        self._zooming = False
+        self.update()
+        self._zoomTimer.start()
+
     @pyqtSlot()
     def on_rangeChanged(self) -> None:
+        if self._zooming:
+            return
+        self._mediaRange, self.zoomLevel = (self.minimum(), self.maximum()), 0
         if self.parent.thumbnailsButton.isChecked():
             self.parent.sliderWidget.setLoader(True)
             self.parent.sliderWidget.hideThumbs()
@@ -360,7 +555,16 @@ class VideoSlider(QSlider):
             self.parent.sliderWidget.setLoader(False)
 
     def wheelEvent(self, event: QWheelEvent) -> None:
-        if self.parent.mediaAvailable:
+        if self.parent.mediaAvailable and event.modifiers() & Qt.ControlModifier:
+            anchor = QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), event.x() - self.offset,
+                                                    self.width() - (self.offset * 2))
+            self.zoomTimeline(1 if event.angleDelta().y() > 0 else -1, anchor)
+            event.accept()
+        elif self.parent.mediaAvailable and event.modifiers() & Qt.ShiftModifier:
+            span = self.maximum() - self.minimum()
+            self.panTimeline(int(span / 8) * (-1 if event.angleDelta().y() > 0 else 1))
+            event.accept()
+        elif self.parent.mediaAvailable:
             if event.angleDelta().y() > 0:
                 self.parent.mpvWidget.frameBackStep()
             else:
@@ -384,6 +588,50 @@ class VideoSlider(QSlider):
     #     self.initStyle()
     #     super(VideoSlider, self).mouseMoveEvent(event)
 
+    @pyqtSlot(str)
+    def setTrickplay(self, path: str) -> None:
+        self._trickplay = None
+        if len(path):
+            sheet = QPixmap(path, 'JPG')
+            if not sheet.isNull():
+                self._trickplay = Munch(self.parent.videoService.trickplayLayout(), sheet=sheet)
+
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        if self._trickplay is not None and self.parent.mediaAvailable:
+            value = QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), event.x() - self.offset,
+                                                   self.width() - (self.offset * 2))
+            tile = min(int(value / 1000 / self._trickplay.interval),
+                       (self._trickplay.columns * self._trickplay.rows) - 1)
+            size = self._trickplay.size
+            preview = self._trickplay.sheet.copy((tile % self._trickplay.columns) * size.width(),
+                                                 (tile // self._trickplay.columns) * size.height(),
+                                                 size.width(), size.height())
+            painter = QPainter(preview)
+            painter.setPen(Qt.white)
+            painter.drawText(preview.rect().adjusted(0, 0, 0, -4), Qt.AlignHCenter | Qt.AlignBottom,
+                             self.parent.delta2QTime(value).toString(self.parent.timeformat))
+            painter.end()
+            self._previewLabel.setPixmap(preview)
+            self._previewLabel.adjustSize()
+            pos = self.mapToGlobal(event.pos())
+            self._previewLabel.move(pos.x() - int(preview.width() / 2), self.mapToGlobal(self.rect().topLeft()).y()
+                                    - preview.height() - 4)
+            self._previewLabel.show()
+        if self.parent.mediaAvailable:
+            hits = self._regions.at(self.valueAt(event.x()))
+            hover = hits[-1] if len(hits) else None
+            if hover is not self._regionHover:
+                self._regionHover = hover
+                self.invalidateLayers('regions')
+        super(VideoSlider, self).mouseMoveEvent(event)
+
+    def leaveEvent(self, event: QEvent) -> None:
+        self._previewLabel.hide()
+        if self._regionHover is not None:
+            self._regionHover = None
+            self.invalidateLayers('regions')
+        super(VideoSlider, self).leaveEvent(event)
+
     def eventFilter(self, obj: QObject, event: QMouseEvent) -> bool:
         if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
             if self.parent.mediaAvailable and self.isEnabled():
@@ -391,6 +639,11 @@ class VideoSlider(QSlider):
                                                         self.width() - (self.offset * 2))
                 self.setValue(newpos)
                 self.parent.setPosition(newpos)
+                hits = self._regions.at(newpos)
+                if len(hits):
+                    row = self.parent.clipTimes.index(hits[-1])
+                    self.parent.cliplist.selectRow(row)
+                    self.selectRegion(row)
                 self.parent.parent.mousePressEvent(event)
         return super(VideoSlider, self).eventFilter(obj, event)
 
@@ -62,8 +62,6 @@ class VideoSliderWidget(QStackedWidget):
             self.genlabel.setVisible(enabled)
 
     def hideThumbs(self) -> None:
-        if self.count() == 3:
-            self.widget(2).hide()
-            self.widget(1).hide()
+        if self.slider.thumbnailsOn:
             self.slider.thumbnailsOn = False
             self.slider.initStyle()